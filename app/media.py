@@ -0,0 +1,164 @@
+"""
+Serving of user uploaded files under MEDIA_ROOT.
+
+Files are answered with ETag and Last-Modified taken from `os.stat`, so
+conditional requests cost no read, and single byte ranges are honoured
+so players can seek in videos. With `MEDIA_SENDFILE` set the web server
+sends the file (ranges included) after Django checked the request.
+Otherwise the file object is handed to `FileResponse`, which lets WSGI
+servers with `wsgi.file_wrapper` send it with `os.sendfile`.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """Reads at most `length` bytes of `file` from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    First and last byte of the single range in a Range `header`, None if
+    the whole file should be sent instead, as for several ranges.
+    """
+    match = RANGE_PATTERN.match(header.replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # the last `last` bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = int(last) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def range_applies(request, etag, last_modified):
+    """Tells whether If-Range, if sent, still names this file."""
+    if_range = request.headers.get("If-Range")
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_content_type(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    if content_type is None or encoding is not None:
+        # a compressed file isn't the type its inner extension says
+        return "application/octet-stream"
+    return content_type
+
+
+def sendfile_response(full_path, path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        prefix = getattr(
+            settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+        )
+        response["X-Accel-Redirect"] = prefix + quote(path)
+    else:
+        response["X-Sendfile"] = full_path
+    return response
+
+
+def file_response(request, full_path, size, content_type, etag, modified):
+    """Sends the file, or the byte range asked for, from Python."""
+    byte_range = None
+    if "Range" in request.headers and range_applies(request, etag, modified):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(full_path, "rb")
+        file.seek(start)
+        # only the file itself can go through os.sendfile, which sends
+        # everything up to the end
+        body = file if end == size - 1 else FileRange(file, length)
+        response = FileResponse(body, content_type=content_type)
+    if byte_range is not None:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = length
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found.")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("File not found.")
+
+    size = file_stat.st_size
+    etag = quote_etag(f"{file_stat.st_mtime_ns:x}-{size:x}")
+    last_modified = int(file_stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content_type = get_content_type(path)
+        if getattr(settings, "MEDIA_SENDFILE", None):
+            # the web server answers Range requests itself
+            response = sendfile_response(full_path, path, content_type)
+        else:
+            response = file_response(
+                request, full_path, size, content_type, etag, last_modified
+            )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
@@ -18,7 +19,7 @@ if DEBUG:
     mimetypes.add_type("application/javascript", ".js", True)
 
     DEBUG_TOOLBAR_CONFIG = {
-        "SHOW_TOOLBAR_CALLBACK": lambda request: True,
+        "SHOW_TOOLBAR_CALLBACK": "app.toolbar.show_toolbar",
     }
 
 ALLOWED_HOSTS = []
@@ -135,6 +136,12 @@ MEDIA_URL = "media/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Lets the web server send media files after Django checked the request:
+# "x-sendfile" for Apache or lighttpd, "x-accel-redirect" for nginx, with
+# an `internal` location at MEDIA_ACCEL_REDIRECT_PREFIX aliasing MEDIA_ROOT.
+MEDIA_SENDFILE = os.environ.get("MEDIA_SENDFILE") or None
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -143,12 +150,85 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
+    ],
+    # orjson backed when it is installed, the stdlib json module otherwise
+    "DEFAULT_RENDERER_CLASSES": [
+        "app.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "app.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ],
 }
 
+# `User.last_request` is tracked at most once per granularity (seconds)
+# and written in bulk every flush interval (seconds).
+LAST_REQUEST_GRANULARITY = 60
+LAST_REQUEST_FLUSH_INTERVAL = 60
+
+# Users resolved by API authentication are kept in an in-process LRU cache.
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TTL = 60
+
+# Home feed: posts of users with more followers than the limit are merged
+# into timelines on read instead of being copied to every follower.
+FEED_FANOUT_FOLLOWER_LIMIT = 10_000
+FEED_BACKFILL_SIZE = 100
+
+# Like analytics rollups of the latest days are recomputed from the likes
+# table by a beat job, repairing likes changed outside of the API.
+LIKE_ROLLUP_REBUILD_DAYS = 2
+# Longest like analytics series a single request may ask for.
+LIKE_ANALYTICS_MAX_BUCKETS = 1000
+
+# Most ids a bulk like or follow request may carry.
+BULK_ACTION_MAX_ITEMS = 200
+
+# Scheduled posts published per transaction by the beat job.
+SCHEDULED_POST_BATCH_SIZE = 1000
+
+# Boxes thumbnails are scaled down to fit, changing one makes the
+# generate_thumbnails command render that kind again.
+THUMBNAIL_SIZES = {"post": (640, 640), "picture": (160, 160)}
+THUMBNAIL_QUALITY = 80
+
+# Set CACHE_BACKEND to a shared cache such as Redis when running several
+# processes, local memory caches are invalidated only in their own process.
+# The cache also keeps the versions that ETag and Last-Modified come from.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+# Post lists and posts served to anonymous users are cached for this many
+# seconds, changed posts are invalidated right away.
+ANONYMOUS_RESPONSE_CACHE_TTL = 300
+
 CELERY_BROKER_URL = "redis://localhost:6379"
 CELERY_RESULT_BACKEND = "redis://localhost:6379"
+CELERY_IMPORTS = (
+    "tasks.post_creation_task",
+    "tasks.like_rollup_task",
+    "tasks.scheduled_post_task",
+    "tasks.thumbnail_task",
+    "tasks.feed_task",
+)
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-like-rollups": {
+        "task": "tasks.like_rollup_task.rebuild_like_rollups",
+        "schedule": crontab(minute=5),
+    },
+    "publish-scheduled-posts": {
+        "task": "tasks.scheduled_post_task.publish_scheduled_posts",
+        "schedule": crontab(),
+    },
+}
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "Social-media-API",
@@ -0,0 +1,9 @@
+from django.conf import settings
+
+
+def show_toolbar(request):
+    """
+    Shows the debug toolbar to everybody while DEBUG is on. The test runner
+    turns DEBUG off, so tests see queries the toolbar would swallow.
+    """
+    return settings.DEBUG
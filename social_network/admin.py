@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from social_network.models import Post, Like, Comment
+from social_network.models import Post, Like, Comment, ScheduledPost
 
 
 @admin.register(Post)
@@ -11,6 +11,13 @@ class PostAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
+@admin.register(ScheduledPost)
+class ScheduledPostAdmin(admin.ModelAdmin):
+    list_display = ("title", "owner", "publish_at")
+    list_filter = ("publish_at",)
+    search_fields = ("title", "owner__username")
+
+
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     list_display = ("user", "post", "created_at")
@@ -0,0 +1,408 @@
+"""
+Like analytics rollups.
+
+Likes are counted per hour and per day of `TIME_ZONE` in `LikeRollup`
+rows, for all posts, every post and every post owner. Rows are updated
+when a like is given or taken back, and `rebuild` recomputes them from
+the `Like` table, which repairs likes created or deleted elsewhere.
+
+A range is answered from whole days, then whole hours at its edges, and
+only the minutes left over are counted in the `Like` table. Series of
+hourly, daily or weekly buckets are read from the rollups in one query.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, F
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from social_network.models import Like, LikeRollup
+
+BATCH_SIZE = 1000
+
+
+def hour_start(moment):
+    return timezone.localtime(moment).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def day_start(moment):
+    return timezone.make_aware(
+        datetime.combine(timezone.localtime(moment).date(), time.min)
+    )
+
+
+def next_hour(moment):
+    # wall clock arithmetic would be off around DST changes
+    return timezone.localtime(
+        hour_start(moment).astimezone(dt_timezone.utc) + timedelta(hours=1)
+    )
+
+
+def next_day(moment):
+    return timezone.make_aware(
+        datetime.combine(
+            timezone.localtime(moment).date() + timedelta(days=1), time.min
+        )
+    )
+
+
+def week_start(moment):
+    day = timezone.localtime(moment).date()
+    return timezone.make_aware(
+        datetime.combine(day - timedelta(days=day.weekday()), time.min)
+    )
+
+
+def next_week(moment):
+    return timezone.make_aware(
+        datetime.combine(
+            week_start(moment).date() + timedelta(weeks=1), time.min
+        )
+    )
+
+
+# interval: (bucket start, next bucket start, database truncation)
+INTERVALS = {
+    "hour": (hour_start, next_hour, TruncHour),
+    "day": (day_start, next_day, TruncDay),
+    "week": (week_start, next_week, TruncWeek),
+}
+
+
+def parse_moment(value, end=False):
+    """
+    Parses an ISO 8601 date or datetime, naive ones in `TIME_ZONE`.
+    A date stands for its whole day, so as an `end` it means the next
+    midnight. Raises ValueError on malformed input.
+    """
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        return timezone.make_aware(datetime.combine(day, time.min))
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    # ends are exclusive, a datetime end itself is still included
+    return moment + timedelta(microseconds=1) if end else moment
+
+
+def ceil(moment, start, step):
+    """First `start`-aligned boundary at or after `moment`."""
+    floor = start(moment)
+    return floor if floor == moment else step(moment)
+
+
+def scopes_of(post_id, owner_id):
+    return [
+        (LikeRollup.ALL, 0),
+        (LikeRollup.POST, post_id),
+        (LikeRollup.OWNER, owner_id),
+    ]
+
+
+def rollup_keys(hour, scopes):
+    """`(scope, key, period, bucket)` of every rollup counting `hour`."""
+    buckets = [
+        (LikeRollup.HOUR, hour_start(hour)),
+        (LikeRollup.DAY, day_start(hour)),
+    ]
+    return [
+        (scope, key, period, bucket)
+        for scope, key in scopes
+        for period, bucket in buckets
+    ]
+
+
+def key_filter(keys):
+    condition = Q()
+    for scope, key, period, bucket in keys:
+        condition |= Q(scope=scope, key=key, period=period, bucket=bucket)
+    return condition
+
+
+def shift(counts):
+    """Adds `counts`, a mapping of rollup keys to deltas, to the rollups."""
+    by_delta = defaultdict(list)
+    for rollup_key, delta in counts.items():
+        if delta:
+            by_delta[delta].append(rollup_key)
+    if not by_delta:
+        return
+    # rows have to exist before they can be shifted atomically
+    _bulk_create(
+        LikeRollup(scope=scope, key=key, period=period, bucket=bucket)
+        for keys in by_delta.values()
+        for scope, key, period, bucket in keys
+    )
+    for delta, keys in by_delta.items():
+        for start in range(0, len(keys), BATCH_SIZE):
+            LikeRollup.objects.filter(
+                key_filter(keys[start : start + BATCH_SIZE])
+            ).update(count=F("count") + delta)
+
+
+def record_like(like, owner_id, delta=1):
+    """Counts `like` in (or, with `delta=-1`, out of) its rollups."""
+    record_likes([like], {like.post_id: owner_id}, delta)
+
+
+def record_likes(likes, owner_ids, delta=1):
+    """
+    Counts `likes` in (or out of) their rollups at once, `owner_ids` maps
+    their post ids to post owner ids.
+    """
+    counts = Counter()
+    for like in likes:
+        scopes = scopes_of(like.post_id, owner_ids[like.post_id])
+        for rollup_key in rollup_keys(like.created_at, scopes):
+            counts[rollup_key] += delta
+    shift(counts)
+
+
+def forget_post(post):
+    """Takes likes of `post`, which is about to be deleted, out of rollups."""
+    counts = Counter()
+    for hour, total in hourly_likes(Like.objects.filter(post_id=post.pk)):
+        for rollup_key in rollup_keys(
+            hour, [(LikeRollup.ALL, 0), (LikeRollup.OWNER, post.owner_id)]
+        ):
+            counts[rollup_key] -= total
+    shift(counts)
+    LikeRollup.objects.filter(scope=LikeRollup.POST, key=post.pk).delete()
+
+
+def hourly_likes(likes, *fields):
+    """Yields `(hour, *fields, total)` of `likes` grouped by local hour."""
+    grouped = (
+        likes.annotate(hour=TruncHour("created_at"))
+        .order_by()
+        .values_list("hour", *fields)
+        .annotate(total=Count("id"))
+    )
+    yield from grouped.iterator()
+
+
+def _bulk_create(rollups):
+    rollups = iter(rollups)
+    while batch := list(islice(rollups, BATCH_SIZE)):
+        LikeRollup.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _bounds(queryset, field):
+    """Oldest and newest `field` values of `queryset`, None if it's empty."""
+    values = queryset.order_by().values_list(field, flat=True)
+    oldest = values.order_by(field).first()
+    if oldest is None:
+        return None
+    return oldest, values.order_by(f"-{field}").first()
+
+
+def rebuild(start=None, end=None):
+    """
+    Recomputes rollups of the days overlapping `[start, end)` from likes.
+    Missing bounds extend the range to the oldest or newest like or rollup.
+
+    Rollups are moved by the difference to the likes table with F()
+    updates of locked rows, so likes counted by `record_likes` while the
+    rebuild runs are neither lost nor counted twice.
+    """
+    if start is None or end is None:
+        bounds = [
+            bound
+            for bound in (
+                _bounds(Like.objects.all(), "created_at"),
+                _bounds(LikeRollup.objects.all(), "bucket"),
+            )
+            if bound is not None
+        ]
+        if not bounds:
+            return
+        start = start or min(oldest for oldest, _ in bounds)
+        end = end or max(newest for _, newest in bounds) + timedelta(
+            microseconds=1
+        )
+    start = day_start(start)
+    end = ceil(end, day_start, next_day)
+
+    with transaction.atomic():
+        # locked before the likes are read, concurrent shifts wait for the
+        # rebuild and apply on top of it
+        stored = {
+            (scope, key, period, bucket): (pk, count)
+            for pk, scope, key, period, bucket, count in (
+                LikeRollup.objects.select_for_update()
+                .filter(bucket__gte=start, bucket__lt=end)
+                .values_list("pk", "scope", "key", "period", "bucket", "count")
+                .iterator()
+            )
+        }
+        counts = Counter()
+        likes = Like.objects.filter(created_at__gte=start, created_at__lt=end)
+        for hour, post_id, owner_id, total in hourly_likes(
+            likes, "post_id", "post__owner_id"
+        ):
+            for rollup_key in rollup_keys(hour, scopes_of(post_id, owner_id)):
+                counts[rollup_key] += total
+
+        _bulk_create(
+            LikeRollup(
+                scope=scope, key=key, period=period, bucket=bucket, count=total
+            )
+            for (scope, key, period, bucket), total in counts.items()
+            if (scope, key, period, bucket) not in stored
+        )
+        by_delta = defaultdict(list)
+        for rollup_key, (pk, count) in stored.items():
+            delta = counts[rollup_key] - count
+            if delta:
+                by_delta[delta].append(pk)
+        for delta, pks in by_delta.items():
+            for index in range(0, len(pks), BATCH_SIZE):
+                LikeRollup.objects.filter(
+                    pk__in=pks[index : index + BATCH_SIZE]
+                ).update(count=F("count") + delta)
+
+
+def raw_likes(scope, key):
+    likes = Like.objects.all()
+    if scope == LikeRollup.POST:
+        return likes.filter(post_id=key)
+    if scope == LikeRollup.OWNER:
+        return likes.filter(post__owner_id=key)
+    return likes
+
+
+def count_likes(start=None, end=None, scope=LikeRollup.ALL, key=0, likes=None):
+    """
+    Counts likes given within `[start, end)` to the posts of the scope.
+    Runs two queries and reads at most one rollup per day of the range.
+    Passing `likes` counts that queryset instead of the rollups.
+    """
+    if likes is not None:
+        if start is not None:
+            likes = likes.filter(created_at__gte=start)
+        if end is not None:
+            likes = likes.filter(created_at__lt=end)
+        return likes.count()
+
+    rollups = Q()
+    raw = []
+
+    first_day = start and ceil(start, day_start, next_day)
+    last_day = end and day_start(end)
+    if first_day is None or last_day is None or first_day < last_day:
+        days = Q(period=LikeRollup.DAY)
+        if first_day is not None:
+            days &= Q(bucket__gte=first_day)
+        if last_day is not None:
+            days &= Q(bucket__lt=last_day)
+        rollups |= days
+        edges = [(start, first_day), (last_day, end)]
+    else:
+        edges = [(start, end)]
+
+    for edge_start, edge_end in edges:
+        if edge_start is None or edge_end is None or edge_start >= edge_end:
+            continue
+        first_hour = ceil(edge_start, hour_start, next_hour)
+        last_hour = hour_start(edge_end)
+        if first_hour < last_hour:
+            rollups |= Q(
+                period=LikeRollup.HOUR,
+                bucket__gte=first_hour,
+                bucket__lt=last_hour,
+            )
+            raw += [(edge_start, first_hour), (last_hour, edge_end)]
+        else:
+            raw.append((edge_start, edge_end))
+
+    total = 0
+    if rollups:
+        total = (
+            LikeRollup.objects.filter(rollups, scope=scope, key=key).aggregate(
+                total=Sum("count")
+            )["total"]
+            or 0
+        )
+    ranges = Q()
+    for raw_start, raw_end in raw:
+        if raw_start < raw_end:
+            ranges |= Q(created_at__gte=raw_start, created_at__lt=raw_end)
+    if ranges:
+        total += raw_likes(scope, key).filter(ranges).count()
+    return total
+
+
+def first_like(scope=LikeRollup.ALL, key=0, likes=None):
+    """Time of the oldest like of the scope, or of `likes` if passed."""
+    if likes is not None:
+        return (
+            likes.order_by("created_at")
+            .values_list("created_at", flat=True)
+            .first()
+        )
+    return (
+        LikeRollup.objects.filter(
+            scope=scope, key=key, period=LikeRollup.HOUR, count__gt=0
+        )
+        .order_by("bucket")
+        .values_list("bucket", flat=True)
+        .first()
+    )
+
+
+def bucket_starts(start, end, interval):
+    """Yields starts of `interval` buckets covering `[start, end)`."""
+    floor, step, _ = INTERVALS[interval]
+    bucket = floor(start)
+    while bucket < end:
+        yield bucket
+        bucket = step(bucket)
+
+
+def like_series(buckets, interval, scope=LikeRollup.ALL, key=0, likes=None):
+    """
+    Returns `(bucket, count)` of likes per `interval` for consecutive
+    `buckets`, empty buckets included. Runs a single grouped query over
+    the rollups, or over `likes` if passed.
+    """
+    if not buckets:
+        return []
+    step, trunc = INTERVALS[interval][1:]
+    start, end = buckets[0], step(buckets[-1])
+
+    if likes is not None:
+        rows = (
+            likes.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(bucket=trunc("created_at"))
+            .order_by()
+            .values_list("bucket")
+            .annotate(total=Count("id"))
+        )
+    else:
+        rollups = LikeRollup.objects.filter(
+            scope=scope, key=key, bucket__gte=start, bucket__lt=end
+        )
+        if interval == "week":
+            rows = (
+                rollups.filter(period=LikeRollup.DAY)
+                .annotate(week=TruncWeek("bucket"))
+                .order_by()
+                .values_list("week")
+                .annotate(total=Sum("count"))
+            )
+        else:
+            rows = rollups.filter(period=interval).values_list(
+                "bucket", "count"
+            )
+
+    counts = dict(rows)
+    return [(bucket, counts.get(bucket, 0)) for bucket in buckets]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SocialNetworkConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "social_network"
+
+    def ready(self):
+        from social_network import signals  # noqa: F401
@@ -0,0 +1,133 @@
+from time import time_ns
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+# Every key depends on this scope, bumping it drops everything at once.
+EVERYTHING = "everything"
+# Content and order of post lists.
+LISTS = "lists"
+# Like and comment counters, and likes, of any post.
+COUNTERS = "counters"
+
+
+def post_scope(post_id):
+    return f"post:{post_id}"
+
+
+def post_counters_scope(post_id):
+    return f"post-counters:{post_id}"
+
+
+def comments_scope(post_id):
+    return f"comments:{post_id}"
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+class ResponseCache:
+    """
+    Response data served to anonymous users, which is the same for
+    everybody, stored in a Django cache.
+    Keys embed versions of their scopes, kept in the same cache.
+    Bumping a version makes every entry of the scope unreachable and the
+    TTL removes them later, so nothing has to be looked up to invalidate.
+    Versions are the time of the last change in nanoseconds, which makes
+    them usable as Last-Modified too.
+    """
+
+    prefix = "anonymous-response"
+    # a version expiring only means a cache miss
+    version_ttl = 24 * 60 * 60
+
+    def __init__(self, alias="default", ttl=300):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_key(self, scope):
+        return f"{self.prefix}:version:{scope}"
+
+    def versions(self, *scopes):
+        keys = [self.version_key(scope) for scope in (EVERYTHING, *scopes)]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # unknown, so changed just now as far as anybody can tell
+                self.cache.add(key, time_ns(), timeout=self.version_ttl)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    @staticmethod
+    def location(request):
+        """Host, path and query params of `request` in a stable order."""
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return f"{request.get_host()}{request.path}?{query}"
+
+    def key(self, scopes, request):
+        versions = ".".join(str(version) for version in self.versions(*scopes))
+        return f"{self.prefix}:{versions}:{self.location(request)}"
+
+    def bump(self, *scopes):
+        version = time_ns()
+        self.cache.set_many(
+            {self.version_key(scope): version for scope in scopes},
+            timeout=self.version_ttl,
+        )
+
+    def invalidate(self, *scopes):
+        """
+        Drops entries of `scopes` now and once the current transaction
+        commits, as requests running in between still read the old rows.
+        """
+        self.bump(*scopes)
+        transaction.on_commit(lambda: self.bump(*scopes))
+
+    def serve(self, request, scopes, view, *args, **kwargs):
+        """Answers `request` from the cache or by calling `view`."""
+        key = self.key(scopes, request)
+        data = self.cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            self.cache.set(key, response.data, timeout=self.ttl)
+        return response
+
+
+response_cache = ResponseCache(
+    alias=getattr(settings, "ANONYMOUS_RESPONSE_CACHE_ALIAS", "default"),
+    ttl=getattr(settings, "ANONYMOUS_RESPONSE_CACHE_TTL", 300),
+)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Serves `list` and `retrieve` responses of anonymous users from
+    `response_cache`. Lists depend on every post, a single post only
+    on itself.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return response_cache.serve(
+            request, [LISTS], super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        post_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return response_cache.serve(
+            request, [post_scope(post_id)], super().retrieve, *args, **kwargs
+        )
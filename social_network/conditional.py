@@ -0,0 +1,54 @@
+from hashlib import sha1
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from social_network.cache import response_cache
+
+
+class ConditionalGetMixin:
+    """
+    Sends ETag and Last-Modified with `list` and `retrieve` responses and
+    answers If-None-Match or If-Modified-Since with 304 Not Modified.
+    Both come from the versions of `get_version_scopes()` in
+    `response_cache` rather than from the rendered body, so a request for
+    an unchanged resource costs one cache read and no query.
+    """
+
+    def get_version_scopes(self):
+        """Scopes whose changes may change the response."""
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_etag(self, request, versions):
+        # the same resource looks different to every user and format
+        identity = "|".join(
+            [
+                str(request.user.pk or 0),
+                request.accepted_renderer.format,
+                response_cache.location(request),
+                *map(str, versions),
+            ]
+        )
+        return quote_etag(sha1(identity.encode()).hexdigest())
+
+    def conditional(self, view, request, *args, **kwargs):
+        versions = response_cache.versions(*self.get_version_scopes())
+        etag = self.get_etag(request, versions)
+        last_modified = max(versions) // 10**9
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
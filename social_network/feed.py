@@ -0,0 +1,151 @@
+"""
+Home timeline maintenance.
+
+Posts are copied into the `FeedEntry` rows of every follower when they are
+published (fan-out on write). Owners with more than
+`FEED_FANOUT_FOLLOWER_LIMIT` followers are skipped, their posts are merged
+into the timeline when it is read (fan-out on read) instead. Owners who
+drop below the limit get their latest posts copied to every follower.
+"""
+
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from social_network.models import FeedEntry, Post
+from user.models import User
+
+BATCH_SIZE = 1000
+
+Follow = User.following.through
+
+
+def get_fanout_limit():
+    return getattr(settings, "FEED_FANOUT_FOLLOWER_LIMIT", 10_000)
+
+
+def get_backfill_size():
+    return getattr(settings, "FEED_BACKFILL_SIZE", 100)
+
+
+def _bulk_create(entries):
+    entries = iter(entries)
+    while batch := list(islice(entries, BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(posts):
+    """Copies `posts` into the timelines of their owners' followers."""
+    owner_ids = {post.owner_id for post in posts}
+    fanned_out_owners = set(
+        User.objects.filter(
+            pk__in=owner_ids, followers_count__lt=get_fanout_limit()
+        ).values_list("pk", flat=True)
+    )
+    posts = [post for post in posts if post.owner_id in fanned_out_owners]
+    if not posts:
+        return
+
+    followers = defaultdict(list)
+    follows = Follow.objects.filter(to_user_id__in=fanned_out_owners)
+    for follower_id, owner_id in follows.values_list(
+        "from_user_id", "to_user_id"
+    ).iterator():
+        followers[owner_id].append(follower_id)
+
+    _bulk_create(
+        FeedEntry(user_id=follower_id, post=post, created_at=post.created_at)
+        for post in posts
+        for follower_id in followers[post.owner_id]
+    )
+
+
+def _latest_posts(owner_ids):
+    """Up to `FEED_BACKFILL_SIZE` latest posts of each of `owner_ids`."""
+    latest_posts = Post.objects.filter(owner_id__in=owner_ids)
+    if len(owner_ids) > 1:
+        return latest_posts.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("owner_id"),
+                order_by=(F("created_at").desc(), F("id").desc()),
+            )
+        ).filter(position__lte=get_backfill_size())
+    return latest_posts[: get_backfill_size()]
+
+
+def backfill(user_id, *followees):
+    """Puts the latest posts of just followed users into the feed."""
+    owner_ids = [
+        followee.id
+        for followee in followees
+        if followee.followers_count < get_fanout_limit()
+    ]
+    if not owner_ids:
+        return
+    _bulk_create(
+        FeedEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in _latest_posts(owner_ids).values_list(
+            "id", "created_at"
+        )
+    )
+
+
+def dropped_below_limit(owner_ids):
+    """
+    Owners out of `owner_ids` just one follower below the fan-out limit,
+    the ones an unfollow moved back to fan-out on write.
+    """
+    return list(
+        User.objects.filter(
+            pk__in=owner_ids, followers_count=get_fanout_limit() - 1
+        ).values_list("pk", flat=True)
+    )
+
+
+def fan_out_latest(owner_ids):
+    """
+    Copies the latest posts of `owner_ids` into the timelines of all their
+    followers. Posts of owners over the fan-out limit were merged on read
+    and never copied, so their feeds need them once the owners drop below.
+    """
+    owner_ids = list(
+        User.objects.filter(
+            pk__in=owner_ids, followers_count__lt=get_fanout_limit()
+        ).values_list("pk", flat=True)
+    )
+    if not owner_ids:
+        return
+    posts = defaultdict(list)
+    for post_id, owner_id, created_at in _latest_posts(owner_ids).values_list(
+        "id", "owner_id", "created_at"
+    ):
+        posts[owner_id].append((post_id, created_at))
+
+    follows = Follow.objects.filter(to_user_id__in=owner_ids)
+    _bulk_create(
+        FeedEntry(user_id=follower_id, post_id=post_id, created_at=created_at)
+        for follower_id, owner_id in follows.values_list(
+            "from_user_id", "to_user_id"
+        ).iterator()
+        for post_id, created_at in posts[owner_id]
+    )
+
+
+def remove(user_id, *followee_ids):
+    """Drops posts of unfollowed users from the feed."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__owner_id__in=followee_ids
+    ).delete()
+
+
+def fanned_in_followees(user_id):
+    """Followed users whose posts are merged into the feed on read."""
+    return list(
+        User.objects.filter(
+            followers__id=user_id, followers_count__gte=get_fanout_limit()
+        ).values_list("pk", flat=True)
+    )
@@ -0,0 +1,63 @@
+import re
+
+from django.db.models import Q
+
+from social_network.models import Hashtag, PostHashtag
+
+HASHTAG_PATTERN = re.compile(r"#(\w{1,100})")
+
+
+def extract_hashtags(*texts):
+    """Returns lowercase hashtag names found in `texts` without the `#`."""
+    return {
+        name.lower()
+        for text in texts
+        if text
+        for name in HASHTAG_PATTERN.findall(text)
+    }
+
+
+def normalize_hashtag(name):
+    return name.lstrip("#").lower()
+
+
+def index_posts(posts):
+    """
+    Brings the hashtag index of `posts` in line with their title and text.
+    Runs a fixed number of queries however many posts are passed.
+    """
+    tags_by_post = {
+        post.pk: extract_hashtags(post.title, post.text) for post in posts
+    }
+    names = set().union(*tags_by_post.values())
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names], ignore_conflicts=True
+    )
+    hashtag_ids = dict(
+        Hashtag.objects.filter(name__in=names).values_list("name", "id")
+    )
+
+    wanted = {
+        (post_id, hashtag_ids[name])
+        for post_id, post_names in tags_by_post.items()
+        for name in post_names
+    }
+    existing = set(
+        PostHashtag.objects.filter(post_id__in=tags_by_post).values_list(
+            "post_id", "hashtag_id"
+        )
+    )
+
+    stale = existing - wanted
+    if stale:
+        condition = Q()
+        for post_id, hashtag_id in stale:
+            condition |= Q(post_id=post_id, hashtag_id=hashtag_id)
+        PostHashtag.objects.filter(condition).delete()
+    PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(post_id=post_id, hashtag_id=hashtag_id)
+            for post_id, hashtag_id in wanted - existing
+        ],
+        ignore_conflicts=True,
+    )
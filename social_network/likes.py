@@ -0,0 +1,141 @@
+"""
+Liking and unliking posts together with their side effects: the post's
+`like_count` and the like analytics rollups.
+
+The unique `(user, post)` constraint decides whether a like already
+exists, so single-post functions never read before they write. Batch
+functions read existing likes once and run a fixed number of queries
+however many posts they get.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from social_network import analytics
+from social_network.cache import (
+    COUNTERS,
+    post_counters_scope,
+    response_cache,
+)
+from social_network.models import Like, Post
+
+
+def _count(likes, owner_ids, delta):
+    """
+    Moves `like_count` of the liked posts and the rollups by `delta`,
+    `owner_ids` maps post ids to post owner ids.
+    """
+    if not likes:
+        return
+    Post.objects.filter(
+        pk__in=[like.post_id for like in likes], like_count__gte=-delta
+    ).update(like_count=F("like_count") + delta)
+    analytics.record_likes(likes, owner_ids, delta)
+    response_cache.invalidate(
+        COUNTERS, *(post_counters_scope(like.post_id) for like in likes)
+    )
+
+
+def like(user, post_id, owner_id):
+    """Likes the post unless `user` already does. Returns whether it did."""
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                new_like = Like.objects.create(user=user, post_id=post_id)
+        except IntegrityError:
+            return False
+        _count([new_like], {post_id: owner_id}, 1)
+    return True
+
+
+def unlike(user, post_id, owner_id):
+    """Takes the like of `user` back if any. Returns whether it did."""
+    with transaction.atomic():
+        old_like = (
+            Like.objects.filter(user=user, post_id=post_id)
+            .only("post_id", "created_at")
+            .first()
+        )
+        if old_like is None:
+            return False
+        deleted, _ = Like.objects.filter(pk=old_like.pk).delete()
+        if not deleted:
+            # a concurrent request took it back first
+            return False
+        _count([old_like], {post_id: owner_id}, -1)
+    return True
+
+
+def toggle(user, post_id, owner_id):
+    """Likes the post or takes the like back. Returns whether it's liked."""
+    with transaction.atomic():
+        if like(user, post_id, owner_id):
+            return True
+        unlike(user, post_id, owner_id)
+    return False
+
+
+def like_many(user, owner_ids):
+    """
+    Likes every post of `owner_ids`, a mapping of post ids to post owner
+    ids, that `user` doesn't like yet. Returns ids of the newly liked posts.
+    """
+    with transaction.atomic():
+        liked = set(
+            Like.objects.filter(user=user, post_id__in=owner_ids).values_list(
+                "post_id", flat=True
+            )
+        )
+        new_likes = Like.objects.bulk_create(
+            [
+                Like(user=user, post_id=post_id)
+                for post_id in owner_ids
+                if post_id not in liked
+            ],
+            ignore_conflicts=True,
+        )
+        if new_likes:
+            # bulk_create returns skipped rows too, a like a concurrent
+            # request inserted first holds that request's time, not ours
+            inserted = set(
+                Like.objects.filter(
+                    user=user,
+                    post_id__in=[like.post_id for like in new_likes],
+                ).values_list("post_id", "created_at")
+            )
+            new_likes = [
+                like
+                for like in new_likes
+                if (like.post_id, like.created_at) in inserted
+            ]
+        _count(new_likes, owner_ids, 1)
+    return {like.post_id for like in new_likes}
+
+
+def unlike_many(user, owner_ids):
+    """
+    Takes likes of `user` back from every post of `owner_ids`.
+    Returns ids of the posts that were liked.
+    """
+    with transaction.atomic():
+        old_likes = list(
+            Like.objects.filter(user=user, post_id__in=owner_ids).only(
+                "post_id", "created_at"
+            )
+        )
+        Like.objects.filter(pk__in=[like.pk for like in old_likes]).delete()
+        _count(old_likes, owner_ids, -1)
+    return {like.post_id for like in old_likes}
+
+
+def unlike_all(user):
+    """
+    Takes back every like of `user` on posts of other users, e.g. before
+    the user is deleted. Returns ids of the posts that were liked.
+    """
+    owner_ids = dict(
+        Post.objects.filter(likes=user)
+        .exclude(owner=user)
+        .values_list("pk", "owner_id")
+    )
+    return unlike_many(user, owner_ids)
@@ -0,0 +1,402 @@
+import statistics
+from collections import namedtuple
+from itertools import count
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social_network import urls as social_network_urls
+from social_network.models import Post, Comment, Hashtag
+from user import urls as user_urls
+from user.models import User
+
+Case = namedtuple("Case", "url_name method label prepare")
+
+
+def url_names(patterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests every endpoint of the `social_network` and `user` apps "
+        "and reports p50/p95 latency and query counts. Fill the database "
+        "with `generate_data` first and run it with DEBUG=False."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Number of timed requests per endpoint",
+        )
+        parser.add_argument(
+            "--email",
+            help="User sending the requests, the most following one "
+            "by default",
+        )
+        parser.add_argument(
+            "--only",
+            help="Benchmark only endpoints whose label contains this text",
+        )
+        parser.add_argument(
+            "--keep-changes",
+            action="store_true",
+            help="Commit the writes instead of rolling them back at the end, "
+            "which also times the commits",
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stdout.write(
+                self.style.WARNING(
+                    "DEBUG is on, the debug toolbar inflates every timing"
+                )
+            )
+        self.unique = count()
+        if options["keep_changes"]:
+            self.run(options)
+            return
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        self.load_fixtures(options["email"])
+        cases = self.get_cases()
+        missing = (
+            url_names(social_network_urls.urlpatterns)
+            | url_names(user_urls.urlpatterns)
+        ) - {case.url_name for case in cases}
+        if missing:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Not benchmarked: {', '.join(sorted(missing))}"
+                )
+            )
+
+        self.client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.anonymous_client = Client()
+        self.stdout.write(
+            f"{'endpoint':<44} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8}"
+        )
+        # the test client talks to "testserver"
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            for case in cases:
+                if options["only"] and options["only"] not in case.label:
+                    continue
+                self.bench(case, options["requests"])
+
+    def load_fixtures(self, email):
+        users = User.objects.all()
+        if email:
+            self.user = users.filter(email=email).first()
+        else:
+            self.user = users.order_by("-following_count", "id").first()
+        self.other = (
+            users.exclude(pk=getattr(self.user, "pk", None))
+            .order_by("-followers_count", "id")
+            .first()
+        )
+        if self.user is None or self.other is None:
+            raise CommandError("Run `generate_data` first.")
+        self.post = Post.objects.order_by("-like_count", "-id").first()
+        if self.post is None:
+            raise CommandError("Run `generate_data` first.")
+        self.own_post = Post.objects.create(
+            owner=self.user, title="Benchmark", text="Benchmark #benchmark"
+        )
+        self.comment = Comment.objects.create(
+            user=self.user, post=self.own_post, text="Benchmark"
+        )
+        self.tag = (
+            Hashtag.objects.annotate(uses=Count("posthashtag"))
+            .order_by("-uses")
+            .values_list("name", flat=True)
+            .first()
+        ) or "benchmark"
+        word = self.post.title.split()[0] if self.post.title else "a"
+        self.search = word[:4]
+
+    def get_cases(self):
+        def url(url_name, **kwargs):
+            return reverse(f"social_network:{url_name}", kwargs=kwargs)
+
+        def user_url(url_name, **kwargs):
+            return reverse(f"user:{url_name}", kwargs=kwargs)
+
+        def fixed(path, data=None):
+            return lambda: (path, data)
+
+        def new_post():
+            post = Post.objects.create(
+                owner=self.user, title="Disposable", text="Disposable"
+            )
+            return url("post-detail", pk=post.pk), None
+
+        def new_comment():
+            comment = Comment.objects.create(
+                user=self.user, post=self.own_post, text="Disposable"
+            )
+            return (
+                url("comment-detail", post_pk=self.own_post.pk, pk=comment.pk),
+                None,
+            )
+
+        def new_user():
+            number = next(self.unique)
+            return user_url("create"), {
+                "email": f"bench{number}@example.com",
+                "username": f"bench{number}",
+                "password": "benchpassword",
+            }
+
+        def bulk(url_name, actions, ids):
+            # alternate so every other request really changes something
+            def prepare():
+                action = actions[next(self.unique) % 2]
+                return reverse(url_name), {action: ids}
+
+            return prepare
+
+        popular_posts = list(
+            Post.objects.order_by("-like_count", "-id").values_list(
+                "pk", flat=True
+            )[:50]
+        )
+        popular_users = list(
+            User.objects.exclude(pk=self.user.pk)
+            .order_by("-followers_count", "id")
+            .values_list("pk", flat=True)[:50]
+        )
+
+        post_pk = self.post.pk
+        comment_detail = url(
+            "comment-detail", post_pk=self.own_post.pk, pk=self.comment.pk
+        )
+        return [
+            Case("api-root", "get", "GET api root", fixed(url("api-root"))),
+            Case("post-list", "get", "GET posts", fixed(url("post-list"))),
+            Case(
+                "post-list",
+                "anonymous",
+                "GET posts anonymously",
+                fixed(url("post-list")),
+            ),
+            Case(
+                "post-list",
+                "get",
+                "GET posts ?search=",
+                fixed(f"{url('post-list')}?search={self.search}"),
+            ),
+            Case(
+                "post-list",
+                "get",
+                "GET posts ?tag=",
+                fixed(f"{url('post-list')}?tag={self.tag}"),
+            ),
+            Case(
+                "post-list",
+                "post",
+                "POST posts",
+                fixed(url("post-list"), {"title": "Bench", "text": "#bench"}),
+            ),
+            Case(
+                "post-detail",
+                "get",
+                "GET post",
+                fixed(url("post-detail", pk=post_pk)),
+            ),
+            Case(
+                "post-detail",
+                "patch",
+                "PATCH post",
+                fixed(
+                    url("post-detail", pk=self.own_post.pk), {"text": "Edit"}
+                ),
+            ),
+            Case("post-detail", "delete", "DELETE post", new_post),
+            Case(
+                "post-like",
+                "post",
+                "POST post like (toggles)",
+                fixed(url("post-like", pk=post_pk)),
+            ),
+            Case(
+                "post-like",
+                "put",
+                "PUT post like",
+                fixed(url("post-like", pk=post_pk), {}),
+            ),
+            Case(
+                "post-like",
+                "delete",
+                "DELETE post like",
+                fixed(url("post-like", pk=post_pk), {}),
+            ),
+            Case(
+                "bulk-like",
+                "post",
+                "POST bulk like/unlike (50 posts)",
+                bulk(
+                    "social_network:bulk-like",
+                    ("like", "unlike"),
+                    popular_posts,
+                ),
+            ),
+            Case(
+                "post-like-analytics",
+                "get",
+                "GET like analytics",
+                fixed(url("post-like-analytics")),
+            ),
+            Case(
+                "like-analytics",
+                "get",
+                "GET like analytics (alias)",
+                fixed(url("like-analytics")),
+            ),
+            Case(
+                "comment-list",
+                "get",
+                "GET comments",
+                fixed(url("comment-list", post_pk=post_pk)),
+            ),
+            Case(
+                "comment-list",
+                "post",
+                "POST comment",
+                fixed(
+                    url("comment-list", post_pk=self.own_post.pk),
+                    {"text": "Bench"},
+                ),
+            ),
+            Case(
+                "comment-detail", "get", "GET comment", fixed(comment_detail)
+            ),
+            Case(
+                "comment-detail",
+                "patch",
+                "PATCH comment",
+                fixed(comment_detail, {"text": "Edit"}),
+            ),
+            Case("comment-detail", "delete", "DELETE comment", new_comment),
+            Case("feed", "get", "GET feed", fixed(url("feed"))),
+            Case(
+                "tag-posts",
+                "get",
+                "GET tag posts",
+                fixed(url("tag-posts", name=self.tag)),
+            ),
+            Case("create", "post", "POST register", new_user),
+            Case("manage", "get", "GET me", fixed(user_url("manage"))),
+            Case(
+                "manage",
+                "patch",
+                "PATCH me",
+                fixed(user_url("manage"), {"bio": "Benchmark"}),
+            ),
+            Case(
+                "user-list", "get", "GET users", fixed(user_url("user-list"))
+            ),
+            Case(
+                "user-list",
+                "get",
+                "GET users ?search=",
+                fixed(f"{user_url('user-list')}?search={self.other.username}"),
+            ),
+            Case(
+                "user-detail",
+                "get",
+                "GET user",
+                fixed(user_url("user-detail", id=self.other.pk)),
+            ),
+            Case(
+                "user-detail",
+                "post",
+                "POST user follow (toggles)",
+                fixed(user_url("user-detail", id=self.other.pk)),
+            ),
+            Case(
+                "bulk-follow",
+                "post",
+                "POST bulk follow/unfollow (50 users)",
+                bulk(
+                    "user:bulk-follow", ("follow", "unfollow"), popular_users
+                ),
+            ),
+            Case(
+                "user-followers",
+                "get",
+                "GET user followers",
+                fixed(user_url("user-followers", id=self.other.pk)),
+            ),
+            Case(
+                "user-following",
+                "get",
+                "GET user following",
+                fixed(user_url("user-following", id=self.user.pk)),
+            ),
+            Case(
+                "user-posts",
+                "get",
+                "GET user posts",
+                fixed(user_url("user-posts", id=self.other.pk)),
+            ),
+            Case(
+                "user-liked-posts",
+                "get",
+                "GET user liked posts",
+                fixed(user_url("user-liked-posts", id=self.user.pk)),
+            ),
+        ]
+
+    def send(self, case, path, data):
+        if case.method == "anonymous":
+            return self.anonymous_client.get(path)
+        if case.method == "get":
+            return self.client.get(path)
+        return getattr(self.client, case.method)(
+            path, data, content_type="application/json"
+        )
+
+    def bench(self, case, requests):
+        timings = []
+        queries = []
+        for _ in range(requests):
+            path, data = case.prepare()
+            with CaptureQueriesContext(connection) as captured:
+                started = perf_counter()
+                response = self.send(case, path, data)
+                timings.append((perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"{case.label} answered {response.status_code}: "
+                    f"{response.content[:200]!r}"
+                )
+            queries.append(len(captured))
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{case.label:<44} {statistics.median(timings):8.2f} "
+            f"{p95:8.2f} {max(queries):8}"
+        )
@@ -0,0 +1,97 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from tasks.post_creation_task import create_post, create_posts
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares publishing posts one `create_post` task at a time with "
+        "batches of `create_posts`, reporting posts per second and queries. "
+        "Tasks run in process and every write is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=1000,
+            help="Number of posts published by each mode",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of posts per create_posts task",
+        )
+        parser.add_argument(
+            "--owners",
+            type=int,
+            default=10,
+            help="Number of users the posts are spread over",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        owners = User.objects.bulk_create(
+            [
+                User(
+                    email=f"bench-author{number}@example.com",
+                    username=f"bench-author{number}",
+                )
+                for number in range(options["owners"])
+            ]
+        )
+        # followers make fan-out part of the measurement
+        for follower in owners:
+            follower.following.add(
+                *(owner for owner in owners if owner != follower)
+            )
+        items = [
+            {
+                "owner_id": owners[number % len(owners)].pk,
+                "title": f"Bench post {number}",
+                "text": f"Bench post {number} #bench #tag{number % 50}",
+            }
+            for number in range(options["posts"])
+        ]
+        batch_size = options["batch_size"]
+
+        self.measure(
+            "create_post",
+            len(items),
+            lambda: [create_post(**item) for item in items],
+        )
+        self.measure(
+            "create_posts",
+            len(items),
+            lambda: [
+                create_posts(items[start : start + batch_size])
+                for start in range(0, len(items), batch_size)
+            ],
+        )
+
+    def measure(self, name, total, function):
+        queries = 0
+
+        # unlike the query log, this doesn't stop at 9000 queries
+        def count_query(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        with connection.execute_wrapper(count_query):
+            started = perf_counter()
+            function()
+            elapsed = perf_counter() - started
+        self.stdout.write(
+            f"{name:>12}: {total / elapsed:10.1f} posts/s, "
+            f"{queries:6} queries"
+        )
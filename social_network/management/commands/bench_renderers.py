@@ -0,0 +1,117 @@
+import statistics
+from io import BytesIO
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils.timezone import now
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from app.renderers import FastJSONParser, FastJSONRenderer, orjson
+from social_network.models import Post
+from social_network.serializers import PostSerializer
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares rendering and parsing a page of serialized posts with "
+        "DRF's JSON classes and the orjson backed ones. Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=1000,
+            help="Number of posts in the rendered list",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of timed runs per renderer",
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson is not installed, both renderers use json"
+                )
+            )
+        # hyperlinks are built for the test client's "testserver"
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            data = self.serialize(options["posts"])
+        repeat = options["repeat"]
+
+        for name, renderer in (
+            ("json", JSONRenderer()),
+            ("orjson", FastJSONRenderer()),
+        ):
+            self.report(
+                f"render {name}",
+                self.time(lambda: renderer.render(data), repeat),
+            )
+
+        body = JSONRenderer().render(data)
+        for name, parser in (
+            ("json", JSONParser()),
+            ("orjson", FastJSONParser()),
+        ):
+            self.report(
+                f"parse {name}",
+                self.time(lambda: parser.parse(BytesIO(body)), repeat),
+            )
+
+    def serialize(self, total):
+        """Serializes `total` unsaved posts, timing it for comparison."""
+        owner = User(id=1, username="bench")
+        created_at = now()
+        posts = []
+        for number in range(1, total + 1):
+            post = Post(
+                id=number,
+                owner=owner,
+                title=f"Post number {number}",
+                text="Benchmark post with some text, ünïcode and #tags " * 4,
+                created_at=created_at - timedelta(minutes=number),
+                like_count=number % 97,
+                comment_count=number % 13,
+            )
+            post.is_liked = bool(number % 2)
+            posts.append(post)
+        request = Request(
+            APIRequestFactory().get("/api/social_network/posts/")
+        )
+
+        started = perf_counter()
+        data = PostSerializer(
+            posts, many=True, context={"request": request}
+        ).data
+        self.report("serialize", [(perf_counter() - started) * 1000])
+        return data
+
+    @staticmethod
+    def time(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = perf_counter()
+            function()
+            timings.append((perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{name:>14}: p50 {statistics.median(timings):8.2f} ms, "
+            f"p95 {p95:8.2f} ms"
+        )
@@ -0,0 +1,139 @@
+import random
+import statistics
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from social_network.models import Post
+from social_network.search import icontains_filter, post_search_index
+from user.models import User
+
+SYLLABLES = (
+    "ka fa pe nal co lo ny cas tle tri al moon dau gh ter ex ha li ber ty "
+    "ba bel no te de vil me ri ca sys tem ad mi ni stra tor"
+).split()
+
+
+def build_vocabulary(randomizer, size=5000):
+    words = set()
+    while len(words) < size:
+        length = randomizer.randint(2, 4)
+        words.add("".join(randomizer.choices(SYLLABLES, k=length)))
+    return sorted(words)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares post search through the FTS5 index with the icontains "
+        "fallback. Run it against a development database only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=1_000_000,
+            help="Number of posts the database should hold",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Insert synthetic posts until --posts is reached",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=20,
+            help="Number of search terms timed per backend",
+        )
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        randomizer = random.Random(options["random_seed"])
+        vocabulary = build_vocabulary(randomizer)
+        # word frequencies follow Zipf's law like natural text does
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        if options["seed"]:
+            self.seed_posts(options["posts"], randomizer, vocabulary, weights)
+        total = Post.objects.count()
+        self.stdout.write(f"Posts in database: {total}")
+
+        terms = randomizer.sample(vocabulary, options["queries"])
+        self.report(
+            "icontains",
+            [
+                self.time_query(
+                    Post.objects.filter(
+                        icontains_filter(("title", "text"), term)
+                    ).order_by("-created_at", "-id")
+                )
+                for term in terms
+            ],
+        )
+
+        if not post_search_index.is_available(Post.objects.db):
+            self.stdout.write(
+                self.style.WARNING("FTS5 index is not available, skipped")
+            )
+            return
+        self.report(
+            "fts5",
+            [
+                self.time_query(
+                    post_search_index.search(
+                        Post.objects.all(), (term, None)
+                    ).order_by("-created_at", "-id")
+                )
+                for term in terms
+            ],
+        )
+        self.report(
+            "fts5 ranked",
+            [
+                self.time_query(
+                    post_search_index.ranked_search(
+                        Post.objects.all(), (term, None)
+                    ).order_by("search_rank", "id")
+                )
+                for term in terms
+            ],
+        )
+
+    @staticmethod
+    def time_query(queryset, page_size=20):
+        started = perf_counter()
+        list(queryset.values_list("id", flat=True)[:page_size])
+        return (perf_counter() - started) * 1000
+
+    def report(self, name, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{name:>12}: p50 {statistics.median(timings):8.2f} ms, "
+            f"p95 {p95:8.2f} ms"
+        )
+
+    def seed_posts(self, target, randomizer, vocabulary, weights):
+        batch_size = 5000
+        owner, _ = User.objects.get_or_create(
+            email="bench@example.com", defaults={"username": "bench"}
+        )
+        missing = target - Post.objects.count()
+        while missing > 0:
+            size = min(batch_size, missing)
+            Post.objects.bulk_create(
+                [
+                    Post(
+                        owner=owner,
+                        title=" ".join(
+                            randomizer.choices(vocabulary, weights, k=3)
+                        ),
+                        text=" ".join(
+                            randomizer.choices(vocabulary, weights, k=30)
+                        ),
+                    )
+                    for _ in range(size)
+                ]
+            )
+            missing -= size
+            self.stdout.write(f"Seeded posts, {missing} left")
@@ -0,0 +1,299 @@
+import random
+from array import array
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils.timezone import now
+
+from social_network import feed
+from social_network.management.commands.bench_search import build_vocabulary
+from social_network.models import Post, Like, Comment
+from user.models import User
+
+Follow = User.following.through
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Lets `bulk_create` keep the `created_at` values it is given instead of
+    stamping every row with the current time.
+    """
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class WeightedPicker:
+    """
+    Picks items with probability proportional to `1 / rank ** exponent`,
+    ranks being shuffled, so a few items get most of the picks.
+    """
+
+    def __init__(self, items, randomizer, exponent=1.0):
+        self.items = items
+        self.randomizer = randomizer
+        ranks = list(range(1, len(items) + 1))
+        randomizer.shuffle(ranks)
+        self.cum_weights = list(
+            accumulate(1 / rank**exponent for rank in ranks)
+        )
+
+    def pick(self):
+        point = self.randomizer.random() * self.cum_weights[-1]
+        index = bisect(self.cum_weights, point)
+        return self.items[min(index, len(self.items) - 1)]
+
+    def pick_distinct(self, count, exclude=None):
+        count = min(count, len(self.items) - (exclude is not None))
+        picked = set()
+        # popular items collide often, give up before looping forever
+        for _ in range(count * 10):
+            if len(picked) >= count:
+                break
+            item = self.pick()
+            if item != exclude:
+                picked.add(item)
+        return picked
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible synthetic dataset: users with a power-law "
+        "follow graph, posts, likes and comments. Run it against a "
+        "development database only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=20,
+            help="Average number of users every user follows",
+        )
+        parser.add_argument("--posts", type=int, default=50_000)
+        parser.add_argument("--likes", type=int, default=200_000)
+        parser.add_argument("--comments", type=int, default=50_000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Activity is spread over this many past days",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password shared by every generated user",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-feed",
+            action="store_true",
+            help="Skip building the materialized home feeds",
+        )
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options["users"] < 2:
+            raise CommandError("At least two users are needed.")
+        self.batch_size = options["batch_size"]
+        self.randomizer = random.Random(options["random_seed"])
+        self.vocabulary = build_vocabulary(self.randomizer)
+        self.word_weights = list(
+            accumulate(1 / rank for rank in range(1, len(self.vocabulary) + 1))
+        )
+        self.end = now()
+        self.span = timedelta(days=options["days"])
+
+        with explicit_timestamps(Post, Like, Comment):
+            user_ids = self.create_users(options["users"], options["password"])
+            self.create_follows(user_ids, options["follows"])
+            post_ids = self.create_posts(user_ids, options["posts"])
+            self.create_likes(user_ids, post_ids, options["likes"])
+            self.create_comments(user_ids, post_ids, options["comments"])
+
+        # bulk_create skips signals, derived data is rebuilt afterwards
+        call_command("recount_counters", stdout=self.stdout)
+        call_command("index_hashtags", stdout=self.stdout)
+        call_command("rebuild_like_rollups", stdout=self.stdout)
+        if not options["no_feed"]:
+            self.fan_out(post_ids)
+        self.stdout.write(self.style.SUCCESS("Synthetic dataset is ready"))
+
+    def bulk_create(self, model, objects, total, ignore_conflicts=False):
+        """Inserts `objects` in batches and returns their primary keys."""
+        pks = array("q")
+        created = 0
+        objects = iter(objects)
+        while batch := list(islice(objects, self.batch_size)):
+            batch = model.objects.bulk_create(
+                batch, ignore_conflicts=ignore_conflicts
+            )
+            pks.extend(obj.pk for obj in batch if obj.pk is not None)
+            created += len(batch)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {created}/{total}",
+                ending="\r",
+            )
+        self.stdout.write("")
+        return pks
+
+    def words(self, count):
+        return " ".join(
+            self.randomizer.choices(
+                self.vocabulary, cum_weights=self.word_weights, k=count
+            )
+        )
+
+    def post_time(self, index, total, share=None):
+        """
+        Posts are published in primary key order over the whole span,
+        the `index`-th one somewhere in the `index`-th slot.
+        """
+        if share is None:
+            share = self.randomizer.random()
+        return self.end - self.span + self.span * (index + share) / total
+
+    def reaction_time(self, published):
+        return published + (self.end - published) * self.randomizer.random()
+
+    def heavy_tailed(self, mean):
+        """Pareto distributed count with the given mean."""
+        value = mean * self.randomizer.paretovariate(2) / 2
+        return int(value + self.randomizer.random())
+
+    def create_users(self, total, password):
+        # one hash for everybody, hashing every user takes minutes
+        password = make_password(password)
+        start = (User.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        joined = self.end - self.span
+        return self.bulk_create(
+            User,
+            (
+                User(
+                    username=f"user{number}",
+                    email=f"user{number}@example.com",
+                    first_name=self.words(1).capitalize(),
+                    last_name=self.words(1).capitalize(),
+                    password=password,
+                    date_joined=joined,
+                )
+                for number in range(start, start + total)
+            ),
+            total,
+        )
+
+    def create_follows(self, user_ids, average):
+        popular = WeightedPicker(user_ids, self.randomizer)
+        self.bulk_create(
+            Follow,
+            (
+                Follow(from_user_id=follower_id, to_user_id=followee_id)
+                for follower_id in user_ids
+                for followee_id in popular.pick_distinct(
+                    self.heavy_tailed(average), exclude=follower_id
+                )
+            ),
+            len(user_ids) * average,
+        )
+
+    def create_posts(self, user_ids, total):
+        active = WeightedPicker(user_ids, self.randomizer)
+
+        def text():
+            words = self.words(self.randomizer.randint(10, 60)).split()
+            for _ in range(self.randomizer.randint(0, 3)):
+                index = self.randomizer.randrange(len(words))
+                words[index] = f"#{words[index]}"
+            return " ".join(words)
+
+        return self.bulk_create(
+            Post,
+            (
+                Post(
+                    owner_id=active.pick(),
+                    title=self.words(self.randomizer.randint(2, 6)),
+                    text=text(),
+                    created_at=self.post_time(index, total),
+                )
+                for index in range(total)
+            ),
+            total,
+        )
+
+    def reactions(self, post_ids, total):
+        """
+        Yields `(post_id, published, count)` with heavy-tailed counts
+        adding up to roughly `total`.
+        """
+        if not post_ids:
+            return
+        mean = total / len(post_ids)
+        for index, post_id in enumerate(post_ids):
+            # the end of the slot is never earlier than the post itself
+            published = self.post_time(index, len(post_ids), share=1)
+            yield post_id, published, self.heavy_tailed(mean)
+
+    def create_likes(self, user_ids, post_ids, total):
+        self.bulk_create(
+            Like,
+            (
+                Like(
+                    user_id=user_id,
+                    post_id=post_id,
+                    created_at=self.reaction_time(published),
+                )
+                for post_id, published, count in self.reactions(
+                    post_ids, total
+                )
+                for user_id in self.randomizer.sample(
+                    user_ids, min(count, len(user_ids))
+                )
+            ),
+            total,
+        )
+
+    def create_comments(self, user_ids, post_ids, total):
+        self.bulk_create(
+            Comment,
+            (
+                Comment(
+                    user_id=self.randomizer.choice(user_ids),
+                    post_id=post_id,
+                    text=self.words(self.randomizer.randint(3, 30)),
+                    created_at=self.reaction_time(published),
+                )
+                for post_id, published, count in self.reactions(
+                    post_ids, total
+                )
+                for _ in range(count)
+            ),
+            total,
+        )
+
+    def fan_out(self, post_ids):
+        fanned_out = 0
+        for start in range(0, len(post_ids), self.batch_size):
+            batch = post_ids[start : start + self.batch_size]
+            feed.fan_out(
+                Post.objects.filter(pk__gte=batch[0], pk__lte=batch[-1]).only(
+                    "pk", "owner_id", "created_at"
+                )
+            )
+            fanned_out += len(batch)
+            self.stdout.write(
+                f"feeds: {fanned_out}/{len(post_ids)} posts", ending="\r"
+            )
+        self.stdout.write("")
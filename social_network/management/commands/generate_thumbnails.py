@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from social_network import thumbnails
+from tasks.thumbnail_task import create_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates missing or outdated thumbnails of post content images "
+        "and profile pictures already stored under MEDIA_ROOT"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=sorted(thumbnails.KINDS),
+            action="append",
+            help="Only this kind of image, may be repeated",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of rows checked and rendered at once",
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Send the batches to celery workers instead of "
+            "rendering them here",
+        )
+
+    def handle(self, *args, **options):
+        for kind in options["kind"] or sorted(thumbnails.KINDS):
+            found, updated = self.backfill(kind, options)
+            if options["queue"]:
+                message = f"Queued {found} {kind} thumbnails"
+            else:
+                message = f"Updated {updated} of {found} {kind} thumbnails"
+            self.stdout.write(self.style.SUCCESS(message))
+
+    @staticmethod
+    def backfill(kind, options):
+        found = updated = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                thumbnails.candidates(kind)
+                .filter(pk__gt=last_pk)
+                .order_by("pk")[: options["batch_size"]]
+            )
+            if not rows:
+                return found, updated
+            last_pk = rows[-1].pk
+            ids = [row.pk for row in rows if thumbnails.is_stale(kind, row)]
+            if not ids:
+                continue
+            found += len(ids)
+            if options["queue"]:
+                create_thumbnails.delay(kind, ids)
+            else:
+                updated += thumbnails.generate(kind, ids)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from social_network.hashtags import index_posts
+from social_network.models import Post
+
+
+class Command(BaseCommand):
+    help = "Builds the hashtag index for existing posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts indexed at once",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        indexed = 0
+        last_pk = 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .only("pk", "title", "text")[:batch_size]
+            )
+            if not posts:
+                break
+            index_posts(posts)
+            indexed += len(posts)
+            last_pk = posts[-1].pk
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts"))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from social_network import analytics
+
+
+class Command(BaseCommand):
+    help = "Recomputes like analytics rollups from the likes table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Rebuild only this many latest days, all of them by default",
+        )
+
+    def handle(self, *args, **options):
+        start = None
+        if options["days"]:
+            start = now() - timedelta(days=options["days"] - 1)
+        analytics.rebuild(start=start)
+        self.stdout.write(self.style.SUCCESS("Rebuilt like rollups"))
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from social_network.cache import EVERYTHING, response_cache
+from social_network.models import Post, Like, Comment
+from user.models import User
+
+
+def count_subquery(queryset, field):
+    """Correlated `COUNT(*)` of `queryset` rows pointing at the outer row."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recomputes denormalized counters of posts and users"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of rows updated per statement",
+        )
+
+    def handle(self, *args, **options):
+        updated = self.recount(
+            Post.objects.all(),
+            options["batch_size"],
+            like_count=count_subquery(Like.objects.all(), "post_id"),
+            comment_count=count_subquery(Comment.objects.all(), "post_id"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} posts"))
+
+        follows = User.following.through.objects.all()
+        updated = self.recount(
+            User.objects.all(),
+            options["batch_size"],
+            followers_count=count_subquery(follows, "to_user_id"),
+            following_count=count_subquery(follows, "from_user_id"),
+            posts_count=count_subquery(Post.objects.all(), "owner_id"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} users"))
+        response_cache.invalidate(EVERYTHING)
+
+    @staticmethod
+    def recount(queryset, batch_size, **counters):
+        """
+        Updates `counters` in primary key ranges of `batch_size`,
+        so every statement locks a bounded number of rows.
+        """
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                return updated
+            with transaction.atomic():
+                updated += queryset.filter(
+                    pk__gte=pks[0], pk__lte=pks[-1]
+                ).update(**counters)
+            last_pk = pks[-1]
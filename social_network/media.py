@@ -0,0 +1,91 @@
+"""
+Content-addressed storage of post content.
+
+Uploads are hashed chunk by chunk and stored under their SHA-256, so the
+same bytes uploaded again are neither written nor kept twice. Django has
+already spooled larger uploads to a temporary file by then, which the
+file system storage moves into place instead of copying, so memory use
+doesn't grow with the file size.
+
+Every post and scheduled post referencing a file holds one reference in
+its `MediaBlob`. The file and its thumbnail are deleted with the last
+reference. Files not
+stored here, like older uploads, have no blob and are never deleted.
+"""
+
+import hashlib
+import os
+
+from django.db import transaction
+from django.db.models import F
+
+from social_network.models import MediaBlob, Post
+from social_network.thumbnails import thumbnail_name
+
+CHUNK_SIZE = 256 * 1024
+UPLOAD_TO = "post_content"
+
+
+def storage():
+    return Post._meta.get_field("content").storage
+
+
+def blob_name(digest, filename):
+    # the extension lets the media server guess the content type
+    extension = os.path.splitext(filename or "")[1].lower()[:10]
+    return f"{UPLOAD_TO}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def digest_of(upload):
+    """SHA-256 of `upload`, read `CHUNK_SIZE` bytes at a time."""
+    sha256 = hashlib.sha256()
+    for chunk in upload.chunks(CHUNK_SIZE):
+        sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def store(upload):
+    """
+    Stores `upload` unless the same bytes are stored already and takes a
+    reference on it. Returns the storage name to assign to the content.
+    """
+    digest = digest_of(upload)
+    name = blob_name(digest, upload.name)
+    files = storage()
+    if not files.exists(name):
+        saved = files.save(name, upload)
+        if saved != name:
+            # a concurrent upload of the same bytes got there first
+            files.delete(saved)
+    # rows have to exist before they can be counted atomically
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, sha256=digest, size=upload.size)],
+        ignore_conflicts=True,
+    )
+    MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+    return name
+
+
+def release(name):
+    """
+    Gives a reference to the file `name` back and deletes the file once
+    the last one is gone and the transaction commits.
+    """
+    if not name:
+        return
+    released = MediaBlob.objects.filter(name=name, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1
+    )
+    if not released:
+        return
+    deleted, _ = MediaBlob.objects.filter(name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: delete_files(name))
+
+
+def delete_files(name):
+    files = storage()
+    files.delete(name)
+    thumbnail = thumbnail_name("post", name)
+    if thumbnail:
+        files.delete(thumbnail)
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post_id=OuterRef("pk"))
+            .order_by()
+            .values("post_id")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("social_network", "Post")
+    Like = apps.get_model("social_network", "Like")
+    Comment = apps.get_model("social_network", "Comment")
+    Post.objects.update(
+        like_count=count_subquery(Like),
+        comment_count=count_subquery(Comment),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social_network", "0005_post_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:52
+
+from django.db import migrations
+
+from social_network.search import post_search_index
+
+
+def create_index(apps, schema_editor):
+    post_search_index.create(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    post_search_index.drop(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social_network", "0008_hashtags"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
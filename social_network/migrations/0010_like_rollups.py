@@ -0,0 +1,101 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:55
+
+from collections import Counter
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def fill_rollups(apps, schema_editor):
+    Like = apps.get_model("social_network", "Like")
+    LikeRollup = apps.get_model("social_network", "LikeRollup")
+    counts = Counter()
+    hourly = (
+        Like.objects.annotate(hour=TruncHour("created_at"))
+        .order_by()
+        .values_list("hour", "post_id", "post__owner_id")
+        .annotate(total=Count("id"))
+    )
+    for hour, post_id, owner_id, total in hourly.iterator():
+        day = timezone.make_aware(
+            datetime.combine(timezone.localtime(hour).date(), time.min)
+        )
+        for scope, key in (("all", 0), ("post", post_id), ("owner", owner_id)):
+            counts[scope, key, "hour", hour] += total
+            counts[scope, key, "day", day] += total
+    LikeRollup.objects.bulk_create(
+        [
+            LikeRollup(
+                scope=scope, key=key, period=period, bucket=bucket, count=total
+            )
+            for (scope, key, period, bucket), total in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social_network", "0009_post_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LikeRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[
+                            ("all", "All posts"),
+                            ("post", "Post"),
+                            ("owner", "Owner"),
+                        ],
+                        max_length=5,
+                    ),
+                ),
+                ("key", models.PositiveBigIntegerField(default=0)),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")],
+                        max_length=4,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["created_at"], name="like_created_at_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["post", "created_at"], name="like_post_created_at_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="likerollup",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "key", "period", "bucket"),
+                name="like_rollup_unique",
+            ),
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
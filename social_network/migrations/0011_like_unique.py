@@ -0,0 +1,69 @@
+# Generated by Django 4.2.2 on 2026-10-18 06:05
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+
+def delete_duplicate_likes(apps, schema_editor):
+    """
+    Keeps the oldest like of every user and post, takes the others out of
+    the post's counter and the rollups.
+    """
+    Like = apps.get_model("social_network", "Like")
+    Post = apps.get_model("social_network", "Post")
+    LikeRollup = apps.get_model("social_network", "LikeRollup")
+    duplicated = (
+        Like.objects.values("user_id", "post_id")
+        .annotate(first_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for group in duplicated.iterator():
+        duplicates = Like.objects.filter(
+            user_id=group["user_id"], post_id=group["post_id"]
+        ).exclude(pk=group["first_id"])
+        owner_id = (
+            Post.objects.filter(pk=group["post_id"])
+            .values_list("owner_id", flat=True)
+            .get()
+        )
+        for created_at in duplicates.values_list("created_at", flat=True):
+            local = timezone.localtime(created_at)
+            hour = local.replace(minute=0, second=0, microsecond=0)
+            day = timezone.make_aware(datetime.combine(local.date(), time.min))
+            for scope, key in (
+                ("all", 0),
+                ("post", group["post_id"]),
+                ("owner", owner_id),
+            ):
+                LikeRollup.objects.filter(
+                    scope=scope, key=key, period="hour", bucket=hour
+                ).update(count=F("count") - 1)
+                LikeRollup.objects.filter(
+                    scope=scope, key=key, period="day", bucket=day
+                ).update(count=F("count") - 1)
+        deleted, _ = duplicates.delete()
+        Post.objects.filter(pk=group["post_id"]).update(
+            like_count=F("like_count") - deleted
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social_network", "0010_like_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_likes, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="like",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="like_user_post_unique"
+            ),
+        ),
+    ]
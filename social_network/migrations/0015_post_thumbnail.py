@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social_network", "0014_media_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="thumbnail",
+            field=models.FileField(
+                blank=True, editable=False, null=True, upload_to=""
+            ),
+        ),
+    ]
@@ -1,8 +1,31 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 
 from user.models import User
 
 
+class PostQuerySet(models.QuerySet):
+    def with_liked_by(self, user):
+        """
+        Annotates every post with `is_liked`, telling whether `user` liked it,
+        so serializers don't have to query likes row by row.
+        """
+        if not user or not user.is_authenticated:
+            return self.annotate(is_liked=Value(False))
+        return self.annotate(
+            is_liked=Exists(
+                Like.objects.filter(post_id=OuterRef("pk"), user_id=user.id)
+            )
+        )
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
 class Post(models.Model):
     owner = models.ForeignKey(
         to=User, on_delete=models.CASCADE, related_name="posts"
@@ -19,12 +42,46 @@ class Post(models.Model):
     content = models.FileField(
         upload_to="post_content/", blank=True, null=True
     )
+    # set by the thumbnail task once the file exists
+    thumbnail = models.FileField(blank=True, null=True, editable=False)
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    hashtags = models.ManyToManyField(
+        Hashtag, through="PostHashtag", related_name="posts"
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f"{self.title} created at {self.created_at}"
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="post_created_at_id_idx",
+            ),
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="post_owner_created_at_id_idx",
+            ),
+        ]
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(to=Post, on_delete=models.CASCADE)
+    hashtag = models.ForeignKey(to=Hashtag, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hashtag", "post"], name="post_hashtag_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.hashtag} on {self.post.title}"
 
 
 class Like(models.Model):
@@ -32,6 +89,19 @@ class Like(models.Model):
     post = models.ForeignKey(to=Post, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="like_user_post_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="like_created_at_idx"),
+            models.Index(
+                fields=["post", "created_at"], name="like_post_created_at_idx"
+            ),
+        ]
+
     def __str__(self):
         return (
             f"{self.user.username} liked "
@@ -39,6 +109,47 @@ class Like(models.Model):
         )
 
 
+class MediaBlob(models.Model):
+    """
+    A post content file stored once under the SHA-256 of its bytes, shared
+    by every post and scheduled post uploading the same bytes.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} used {self.ref_count} times"
+
+
+class ScheduledPost(models.Model):
+    """A post waiting for `publish_at`, published by a beat job."""
+
+    owner = models.ForeignKey(
+        to=User, on_delete=models.CASCADE, related_name="scheduled_posts"
+    )
+    title = models.CharField(max_length=255)
+    text = models.TextField()
+    content = models.FileField(
+        upload_to="post_content/", blank=True, null=True
+    )
+    publish_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["publish_at", "id"], name="scheduled_post_publish_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} scheduled for {self.publish_at}"
+
+
 class Comment(models.Model):
     user = models.ForeignKey(
         to=User, on_delete=models.CASCADE, related_name="comments"
@@ -50,8 +161,82 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_updated = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "created_at", "id"],
+                name="comment_post_created_at_idx",
+            ),
+        ]
+
     def __str__(self):
         return (
             f"Comment by {self.user.username} on "
             f"{self.post.title} at {self.created_at}"
         )
+
+
+class FeedEntry(models.Model):
+    """
+    Row of a materialized home timeline: `post` shows up in `user`'s feed.
+    `created_at` repeats the post's one, so a feed page is a range read
+    over a single index.
+    """
+
+    user = models.ForeignKey(
+        to=User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    post = models.ForeignKey(
+        to=Post, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="feed_entry_user_post_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-post"],
+                name="feed_user_created_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} in feed of {self.user.username}"
+
+
+class LikeRollup(models.Model):
+    """
+    Number of likes given within one hour or one day of `TIME_ZONE`,
+    to all posts, to a single post or to the posts of a single owner.
+    `key` holds the post or owner id and is 0 for all posts.
+    """
+
+    ALL = "all"
+    POST = "post"
+    OWNER = "owner"
+    SCOPE_CHOICES = ((ALL, "All posts"), (POST, "Post"), (OWNER, "Owner"))
+
+    HOUR = "hour"
+    DAY = "day"
+    PERIOD_CHOICES = ((HOUR, "Hour"), (DAY, "Day"))
+
+    scope = models.CharField(max_length=5, choices=SCOPE_CHOICES)
+    key = models.PositiveBigIntegerField(default=0)
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "key", "period", "bucket"],
+                name="like_rollup_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.count} likes per {self.period} from {self.bucket}"
@@ -0,0 +1,258 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import date, datetime
+from urllib import parse
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from social_network import feed
+from social_network.models import FeedEntry
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks by the full ordering key instead of
+    the first ordering field plus an offset.
+    Cursors are opaque and carry the key of the boundary row, so
+    every page is a single indexed range read no matter how deep it is.
+    All ordering fields have to share one direction and together
+    identify a row uniquely.
+
+    Views ordering rows by a score that moves as other rows change, like
+    a full-text search rank, set `ranked_ordering` instead. Seeking by
+    such a score skips or repeats rows, so those cursors carry an offset.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        ranked_ordering = getattr(view, "ranked_ordering", None)
+        if ranked_ordering:
+            return self.paginate_by_offset(queryset, ranked_ordering)
+        self.offset = None
+
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse = self.cursor.reverse
+            position = self.decode_position(self.cursor.position, queryset)
+
+        results = self.fetch_page(queryset, self.ordering, position, reverse)
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def paginate_by_offset(self, queryset, ordering):
+        self.offset = 0
+        if self.cursor is not None:
+            try:
+                self.offset = int(self.cursor.position)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if self.offset < 0:
+                raise NotFound(self.invalid_cursor_message)
+        queryset = queryset.order_by(*ordering)
+        results = list(
+            queryset[self.offset : self.offset + self.page_size + 1]
+        )
+        self.page = results[: self.page_size]
+        self.has_next = len(results) > self.page_size
+        self.has_previous = self.offset > 0
+        return self.page
+
+    def fetch_page(self, queryset, ordering, position, reverse):
+        """
+        Returns up to `page_size + 1` objects following `position`.
+        The extra object only tells whether one more page exists.
+        """
+        if reverse:
+            ordering = self.reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(ordering, position))
+        return list(queryset[: self.page_size + 1])
+
+    @staticmethod
+    def reverse_ordering(ordering):
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in ordering
+        )
+
+    @staticmethod
+    def seek_filter(ordering, position):
+        """
+        Builds `(a, b) < (x, y)` as `a < x OR (a = x AND b < y)`,
+        which every database can serve from a composite index.
+        """
+        lookup = "lt" if ordering[0].startswith("-") else "gt"
+        fields = [field.lstrip("-") for field in ordering]
+        condition = Q()
+        for index, field in enumerate(fields):
+            equal = dict(zip(fields[:index], position))
+            condition |= Q(**equal, **{f"{field}__{lookup}": position[index]})
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.offset is not None:
+            return self.encode_offset(self.offset + self.page_size)
+        position = self.encode_position(self.page[-1])
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.offset is not None:
+            return self.encode_offset(max(self.offset - self.page_size, 0))
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        position = self.encode_position(self.page[0])
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def encode_offset(self, offset):
+        if not offset:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=str(offset))
+        )
+
+    def encode_position(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip("-"))
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            values.append(value)
+        return json.dumps(values, separators=(",", ":"))
+
+    def decode_position(self, position, queryset):
+        try:
+            values = json.loads(position)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self.to_python(queryset.model, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def to_python(model, field_name, value):
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def encode_cursor(self, cursor):
+        tokens = {"r": "1"} if cursor.reverse else {}
+        tokens["p"] = cursor.position
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = tokens["p"][0]
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+
+class PostCursorPagination(KeysetCursorPagination):
+    """Newest posts first, matching `Post.Meta.ordering`."""
+
+    ordering = ("-created_at", "-id")
+
+
+class UserCursorPagination(KeysetCursorPagination):
+    """Users in the order they joined."""
+
+    ordering = ("id",)
+
+
+class CommentCursorPagination(KeysetCursorPagination):
+    """Oldest comments first, so a thread reads top to bottom."""
+
+    ordering = ("created_at", "id")
+
+
+class FeedCursorPagination(PostCursorPagination):
+    """
+    Pages through the materialized timeline of the requesting user and
+    merges in posts of followees that are fanned out on read.
+    """
+
+    def fetch_page(self, queryset, ordering, position, reverse):
+        if reverse:
+            ordering = self.reverse_ordering(ordering)
+        limit = self.page_size + 1
+        user_id = self.request.user.id
+
+        descending = ordering[0].startswith("-")
+        entry_ordering = (
+            ("-created_at", "-post_id")
+            if descending
+            else ("created_at", "post_id")
+        )
+        entries = FeedEntry.objects.filter(user_id=user_id)
+        if position is not None:
+            entries = entries.filter(
+                self.seek_filter(entry_ordering, position)
+            )
+        entries = entries.order_by(*entry_ordering)
+        keys = list(entries.values_list("created_at", "post_id")[:limit])
+
+        followee_ids = feed.fanned_in_followees(user_id)
+        if followee_ids:
+            pulled = queryset.filter(owner_id__in=followee_ids)
+            if position is not None:
+                pulled = pulled.filter(self.seek_filter(ordering, position))
+            pulled = pulled.order_by(*ordering)
+            keys = set(keys).union(
+                pulled.values_list("created_at", "id")[:limit]
+            )
+            keys = sorted(keys, reverse=descending)[:limit]
+
+        posts = queryset.in_bulk([post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
@@ -0,0 +1,167 @@
+"""
+SQLite FTS5 full-text search.
+
+Every index is an external-content FTS5 table kept in sync with its model
+table by triggers, so bulk inserts and raw updates are indexed too.
+Other databases, or SQLite builds without FTS5, fall back to `icontains`.
+"""
+
+import re
+
+from django.db import connections, DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class FullTextIndex:
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = tuple(columns)
+        self.fts_table = f"{table}_fts"
+        self._available = {}
+
+    def create_statements(self):
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in self.columns)
+        old_values = ", ".join(f"old.{column}" for column in self.columns)
+        fts = self.fts_table
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{self.table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT "
+            f"ON {self.table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) "
+            f"VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE "
+            f"ON {self.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE "
+            f"OF {columns} ON {self.table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {columns}) "
+            f"VALUES (new.id, {new_values}); END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+
+    def drop_statements(self):
+        fts = self.fts_table
+        return [
+            f"DROP TRIGGER IF EXISTS {fts}_insert",
+            f"DROP TRIGGER IF EXISTS {fts}_delete",
+            f"DROP TRIGGER IF EXISTS {fts}_update",
+            f"DROP TABLE IF EXISTS {fts}",
+        ]
+
+    def create(self, connection):
+        """Creates and fills the index, a no-op outside SQLite or FTS5."""
+        self._available.pop(connection.alias, None)
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            try:
+                for statement in self.create_statements():
+                    cursor.execute(statement)
+            except DatabaseError:
+                # SQLite compiled without FTS5, searches fall back
+                pass
+
+    def drop(self, connection):
+        self._available.pop(connection.alias, None)
+        if connection.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            for statement in self.drop_statements():
+                cursor.execute(statement)
+
+    def is_available(self, using=DEFAULT_DB_ALIAS):
+        if using not in self._available:
+            connection = connections[using]
+            self._available[using] = (
+                connection.vendor == "sqlite"
+                and self.fts_table in connection.introspection.table_names()
+            )
+        return self._available[using]
+
+    @staticmethod
+    def match_expression(search, columns=None):
+        """
+        Turns free user input into an FTS5 query: every word has to match
+        as a prefix, optionally restricted to some columns.
+        Returns None if the input holds no searchable words.
+        """
+        terms = " ".join(
+            f'"{token}"*' for token in TOKEN_PATTERN.findall(search)
+        )
+        if not terms:
+            return None
+        if columns:
+            return f"{{{' '.join(columns)}}} : ({terms})"
+        return terms
+
+    def query(self, matches):
+        """
+        FTS5 query requiring every `(search, columns)` pair of `matches`,
+        `columns` set to None searches every indexed column.
+        Returns None if some search holds no searchable words.
+        """
+        expressions = [
+            self.match_expression(search, columns)
+            for search, columns in matches
+        ]
+        if None in expressions:
+            return None
+        return " AND ".join(expressions)
+
+    def search(self, queryset, *matches):
+        """
+        Restricts `queryset` to rows matching every pair of `matches`.
+        The match doesn't name the model table, so the result also works
+        as a subquery, where Django aliases that table.
+        Returns None when the index can't serve the query.
+        """
+        if not self.is_available(queryset.db):
+            return None
+        query = self.query(matches)
+        if query is None:
+            return queryset.none()
+        fts = self.fts_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [query]
+            )
+        )
+
+    def ranked_search(self, queryset, *matches):
+        """
+        Like `search`, and annotates rows with `search_rank` (lower is
+        better). The join names the model table, so use it for top level
+        queries only.
+        """
+        if not self.is_available(queryset.db):
+            return None
+        query = self.query(matches)
+        if query is None:
+            return queryset.none()
+        fts = self.fts_table
+        # a join lets FTS5 compute the rank once per query, a correlated
+        # subquery would rescan the match for every row
+        return queryset.extra(
+            tables=[fts],
+            where=[f"{fts}.rowid = {self.table}.id", f"{fts} MATCH %s"],
+            params=[query],
+        ).annotate(search_rank=RawSQL(f"{fts}.rank", ()))
+
+
+def icontains_filter(fields, search):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f"{field}__icontains": search})
+    return condition
+
+
+post_search_index = FullTextIndex("social_network_post", ("title", "text"))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
@@ -6,6 +7,51 @@ from user.models import User
 from drf_spectacular.utils import extend_schema_field
 
 
+def selected_fields(request, fields):
+    """
+    Names out of `fields` a GET request keeps with `?fields=` (only these)
+    and `?omit=` (all but these), both comma separated.
+    Other requests keep every field.
+    """
+    selected = list(fields)
+    if request is None or request.method != "GET":
+        return selected
+    for param in ("fields", "omit"):
+        value = request.query_params.get(param)
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        unknown = names.difference(fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {param: f"Unknown fields: {', '.join(sorted(unknown))}."}
+            )
+        if param == "fields":
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+    return selected
+
+
+class SparseFieldsMixin:
+    """
+    Drops fields a GET request leaves out with `?fields=` or `?omit=`,
+    so they are never evaluated. Applies to the top level serializer only.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        return {
+            name: fields[name]
+            for name in selected_fields(self.context.get("request"), fields)
+        }
+
+
 class UserSerializer(serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
 
@@ -26,7 +72,21 @@ class UserSerializer(serializers.ModelSerializer):
         return None
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostFieldsMixin(SparseFieldsMixin):
+    @classmethod
+    def prepare_queryset(cls, queryset, request):
+        """Joins and annotates only what the selected fields need."""
+        fields = selected_fields(request, cls.Meta.fields)
+        if "owner" in fields:
+            queryset = queryset.select_related("owner")
+        if "liked_by_current_user" in fields:
+            queryset = queryset.with_liked_by(request.user)
+        if "text" not in fields:
+            queryset = queryset.defer("text")
+        return queryset
+
+
+class PostSerializer(PostFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
     liked_by_current_user = serializers.SerializerMethodField()
     edited = serializers.BooleanField(source="is_updated", read_only=True)
@@ -51,21 +111,27 @@ class PostSerializer(serializers.ModelSerializer):
             "created_at",
             "text",
             "content",
+            "thumbnail",
             "liked_by_current_user",
+            "like_count",
+            "comment_count",
             "edited",
             "comments",
             "scheduled_time",
         )
+        read_only_fields = ("like_count", "comment_count", "thumbnail")
 
     @extend_schema_field(serializers.BooleanField)
     def get_liked_by_current_user(self, obj: Post):
         if not isinstance(obj, Post):
             return False
+        if hasattr(obj, "is_liked"):
+            return obj.is_liked
         user = self.context.get("request").user
         return obj.likes.filter(id=user.id).exists()
 
 
-class RestrictedPostSerializer(serializers.ModelSerializer):
+class RestrictedPostSerializer(PostFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
 
     class Meta:
@@ -99,3 +165,36 @@ class CommentListSerializer(serializers.ModelSerializer):
             "created_at",
             "edited",
         )
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """
+    Base of batch endpoints taking lists of ids, every list naming
+    an action to apply to the objects.
+    """
+
+    def validate(self, attrs):
+        ids = [pk for action_ids in attrs.values() for pk in action_ids]
+        if not ids:
+            raise serializers.ValidationError("Pass at least one id.")
+        limit = getattr(settings, "BULK_ACTION_MAX_ITEMS", 200)
+        if len(ids) > limit:
+            raise serializers.ValidationError(
+                f"Pass at most {limit} ids at once."
+            )
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                "Every id may be passed only once."
+            )
+        return attrs
+
+
+def id_list_field():
+    return serializers.ListField(
+        child=serializers.IntegerField(min_value=1), default=list
+    )
+
+
+class BulkLikeSerializer(BulkActionSerializer):
+    like = id_list_field()
+    unlike = id_list_field()
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from social_network.cache import (
+    COUNTERS,
+    LISTS,
+    comments_scope,
+    post_counters_scope,
+    post_scope,
+    response_cache,
+)
+from social_network import analytics, likes, media
+from social_network.hashtags import index_posts
+from social_network.models import Comment, Post, ScheduledPost
+from tasks.thumbnail_task import schedule_thumbnails
+from user.models import User
+
+
+@receiver(post_save, sender=Post)
+def index_post_hashtags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {"title", "text"} & update_fields:
+        return
+    index_posts([instance])
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_thumbnail(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "content" not in update_fields:
+        return
+    schedule_thumbnails("post", [instance])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_post(sender, instance, **kwargs):
+    response_cache.invalidate(LISTS, post_scope(instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def forget_post_likes(sender, instance, **kwargs):
+    # also runs for posts deleted by the admin or with their owner
+    analytics.forget_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ScheduledPost)
+def release_content(sender, instance, **kwargs):
+    media.release(instance.content.name)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_cached_comment(sender, instance, created=True, **kwargs):
+    scopes = [comments_scope(instance.post_id)]
+    if created:
+        # saved for the first time or deleted, the comment count changes
+        scopes += [COUNTERS, post_counters_scope(instance.post_id)]
+    response_cache.invalidate(*scopes)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_author(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    # posts and comments show their author's username
+    if update_fields is not None and "username" not in update_fields:
+        return
+    renamed = instance.username != getattr(instance, "_saved_username", None)
+    instance._saved_username = instance.username
+    if created or not renamed:
+        return
+    post_ids = Post.objects.filter(owner_id=instance.pk).values_list(
+        "pk", flat=True
+    )
+    commented_post_ids = (
+        Comment.objects.filter(user_id=instance.pk)
+        .values_list("post_id", flat=True)
+        .distinct()
+    )
+    response_cache.invalidate(
+        LISTS,
+        *(post_scope(post_id) for post_id in post_ids),
+        *(comments_scope(post_id) for post_id in commented_post_ids),
+    )
+
+
+@receiver(pre_delete, sender=User)
+def take_back_likes(sender, instance, **kwargs):
+    # the cascade would delete likes without moving post like counts,
+    # likes of the user's own posts go away with the posts
+    likes.unlike_all(instance)
@@ -0,0 +1,316 @@
+from datetime import datetime, timedelta
+
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network import analytics
+from social_network.models import Post, Like, LikeRollup
+from social_network.tests.test_search import FullTextIndexTestMixin
+from tasks.like_rollup_task import rebuild_like_rollups
+from user.models import User
+
+
+def aware(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class LikeRollupTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="analytics@example.com",
+            username="analytics",
+            password="testpassword",
+        )
+        self.post = Post.objects.create(
+            owner=self.user, title="Post", text="Liked a lot"
+        )
+        self.other_post = Post.objects.create(
+            owner=self.user, title="Other", text="Liked too"
+        )
+
+    def like(self, post, created_at):
+        user = User.objects.create_user(
+            email=f"fan{Like.objects.count()}@example.com",
+            username=f"fan{Like.objects.count()}",
+        )
+        like = Like.objects.create(user=user, post=post)
+        Like.objects.filter(pk=like.pk).update(created_at=created_at)
+        like.created_at = created_at
+        return like
+
+    def assertCountsMatch(self, start, end):
+        likes = Like.objects.all()
+        if start is not None:
+            likes = likes.filter(created_at__gte=start)
+        if end is not None:
+            likes = likes.filter(created_at__lt=end)
+        self.assertEqual(
+            analytics.count_likes(start, end),
+            likes.count(),
+            f"likes within [{start}, {end})",
+        )
+        self.assertEqual(
+            analytics.count_likes(
+                start, end, LikeRollup.POST, self.other_post.pk
+            ),
+            likes.filter(post=self.other_post).count(),
+        )
+
+
+class LikeRollupTest(LikeRollupTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        first = aware(2026, 3, 27, 22, 40)
+        # likes around the switch to summer time on March 29th
+        for index in range(40):
+            post = self.post if index % 3 else self.other_post
+            self.like(post, first + timedelta(hours=3, minutes=7) * index)
+        analytics.rebuild()
+
+    def test_ranges_match_likes_table(self):
+        self.assertCountsMatch(None, None)
+        self.assertCountsMatch(aware(2026, 3, 28, 5, 17), None)
+        self.assertCountsMatch(None, aware(2026, 3, 30, 1, 3))
+        self.assertCountsMatch(aware(2026, 3, 28, 5, 17), aware(2026, 4, 1))
+        self.assertCountsMatch(aware(2026, 3, 29), aware(2026, 3, 30))
+        self.assertCountsMatch(
+            aware(2026, 3, 29, 2, 30), aware(2026, 3, 29, 5, 30)
+        )
+        self.assertCountsMatch(
+            aware(2026, 3, 28, 23, 50), aware(2026, 3, 29, 0, 10)
+        )
+
+    def test_day_of_dst_change_has_one_rollup(self):
+        days = LikeRollup.objects.filter(
+            scope=LikeRollup.ALL,
+            period=LikeRollup.DAY,
+            bucket__gte=aware(2026, 3, 29),
+            bucket__lt=aware(2026, 3, 30),
+        )
+        self.assertEqual(days.count(), 1)
+
+    def test_year_range_runs_two_queries(self):
+        with self.assertNumQueries(2):
+            analytics.count_likes(
+                aware(2025, 4, 1, 10, 30), aware(2026, 4, 1, 10, 30)
+            )
+
+    def test_recorded_likes_are_counted(self):
+        moment = aware(2026, 3, 29, 12, 30)
+        like = self.like(self.post, moment)
+        analytics.record_like(like, self.user.pk)
+        self.assertCountsMatch(None, None)
+
+        like.delete()
+        analytics.record_like(like, self.user.pk, -1)
+        self.assertCountsMatch(None, None)
+
+    def test_deleted_post_is_forgotten(self):
+        self.other_post.delete()
+
+        self.assertCountsMatch(None, None)
+        self.assertFalse(
+            LikeRollup.objects.filter(
+                scope=LikeRollup.POST, key=self.other_post.pk
+            ).exists()
+        )
+        self.assertEqual(
+            analytics.count_likes(scope=LikeRollup.OWNER, key=self.user.pk),
+            Like.objects.count(),
+        )
+
+    def test_deleted_users_are_forgotten(self):
+        fan = Like.objects.filter(post=self.other_post).first().user
+        fan.delete()
+        self.assertCountsMatch(None, None)
+
+        self.user.delete()
+        self.assertEqual(analytics.count_likes(), 0)
+
+    def test_rebuild_repairs_rollups(self):
+        LikeRollup.objects.update(count=0)
+        analytics.rebuild(aware(2026, 3, 28, 12), aware(2026, 3, 29, 12))
+
+        repaired = analytics.count_likes(
+            aware(2026, 3, 28), aware(2026, 3, 30)
+        )
+        self.assertEqual(
+            repaired,
+            Like.objects.filter(
+                created_at__gte=aware(2026, 3, 28),
+                created_at__lt=aware(2026, 3, 30),
+            ).count(),
+        )
+        self.assertEqual(analytics.count_likes(None, aware(2026, 3, 28)), 0)
+
+    def test_rebuild_moves_rollups_in_place(self):
+        rollup = LikeRollup.objects.filter(
+            scope=LikeRollup.ALL, period=LikeRollup.DAY
+        ).first()
+        LikeRollup.objects.filter(pk=rollup.pk).update(count=F("count") + 5)
+        Like.objects.all().delete()
+
+        analytics.rebuild()
+
+        self.assertEqual(LikeRollup.objects.get(pk=rollup.pk).count, 0)
+        self.assertEqual(analytics.count_likes(), 0)
+        self.assertIsNone(analytics.first_like())
+
+    def test_beat_task_rebuilds_latest_days(self):
+        like = self.like(self.post, timezone.now())
+
+        rebuild_like_rollups()
+
+        self.assertEqual(
+            analytics.count_likes(scope=LikeRollup.POST, key=self.post.pk),
+            Like.objects.filter(post=self.post).count(),
+        )
+        self.assertEqual(
+            analytics.count_likes(start=analytics.day_start(like.created_at)),
+            1,
+        )
+
+
+class LikeAnalyticsViewTest(LikeRollupTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("social_network:like-analytics")
+        for day in (1, 1, 2, 3, 5):
+            self.like(self.post, aware(2026, 6, day, 13))
+        self.like(self.other_post, aware(2026, 6, 2, 23, 30))
+        analytics.rebuild()
+
+    def total(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["total_likes"]
+
+    def test_totals(self):
+        self.assertEqual(self.total(), 6)
+        self.assertEqual(self.total(date="2026-06-01"), 2)
+        self.assertEqual(self.total(date="2026-06-02"), 2)
+        self.assertEqual(self.total(date_from="2026-06-03"), 2)
+        self.assertEqual(self.total(date_to="2026-06-02"), 4)
+        self.assertEqual(
+            self.total(date_from="2026-06-02", date_to="2026-06-03"), 3
+        )
+        self.assertEqual(
+            self.total(
+                date_from="2026-06-01T12:00", date_to="2026-06-02T13:00"
+            ),
+            3,
+        )
+
+    def test_search_counts_likes_of_matching_posts(self):
+        self.assertEqual(self.total(search="Other"), 1)
+
+    def test_malformed_date(self):
+        response = self.client.get(self.url, {"date": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_like_and_unlike_update_rollups(self):
+        url = reverse("social_network:post-like", args=[self.other_post.pk])
+        self.client.post(url)
+        self.assertEqual(self.total(), 7)
+
+        self.client.post(url)
+        self.assertEqual(self.total(), 6)
+
+    def test_deleted_post_is_not_counted(self):
+        self.client.delete(
+            reverse("social_network:post-detail", args=[self.post.pk])
+        )
+        self.assertEqual(self.total(), 1)
+
+    def series(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (item["start"], item["likes"]) for item in response.data["series"]
+        ]
+
+    def test_daily_series_is_zero_filled(self):
+        series = self.series(
+            interval="day", date_from="2026-06-01", date_to="2026-06-05"
+        )
+
+        self.assertEqual([likes for _, likes in series], [2, 2, 1, 0, 1])
+        self.assertEqual(series[0][0], aware(2026, 6, 1))
+        self.assertEqual(series[3][0], aware(2026, 6, 4))
+
+    def test_weekly_series(self):
+        series = self.series(
+            interval="week", date_from="2026-06-01", date_to="2026-06-14"
+        )
+
+        # June 1st 2026 is a Monday
+        self.assertEqual(
+            series, [(aware(2026, 6, 1), 6), (aware(2026, 6, 8), 0)]
+        )
+
+    def test_hourly_series_follows_dst(self):
+        self.like(self.post, aware(2026, 3, 29, 5, 20))
+        analytics.rebuild()
+
+        series = self.series(interval="hour", date="2026-03-29")
+
+        self.assertEqual(len(series), 23)
+        self.assertEqual(sum(likes for _, likes in series), 1)
+        self.assertIn((aware(2026, 3, 29, 5), 1), series)
+
+    def test_series_by_post_and_owner(self):
+        params = {
+            "interval": "day",
+            "date_from": "2026-06-01",
+            "date_to": "2026-06-03",
+        }
+        by_post = self.series(post=self.other_post.pk, **params)
+        by_owner = self.series(owner=self.user.pk, **params)
+
+        self.assertEqual([likes for _, likes in by_post], [0, 1, 0])
+        self.assertEqual([likes for _, likes in by_owner], [2, 2, 1])
+        self.assertEqual(self.total(post=self.post.pk), 5)
+
+    def test_series_of_searched_posts(self):
+        series = self.series(
+            interval="day",
+            date_from="2026-06-01",
+            date_to="2026-06-03",
+            search="Other",
+        )
+
+        self.assertEqual([likes for _, likes in series], [0, 1, 0])
+
+    def test_series_runs_one_query(self):
+        params = {
+            "interval": "day",
+            "date_from": "2026-01-01",
+            "date_to": "2026-12-31",
+        }
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, params)
+        self.assertEqual(len(response.data["series"]), 365)
+
+    def test_invalid_series_parameters(self):
+        for params in (
+            {"interval": "month"},
+            {"interval": "hour", "date_from": "2020-01-01"},
+            {"post": self.post.pk, "owner": self.user.pk},
+            {"post": "first"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
+
+
+class LikeAnalyticsFullTextSearchTest(
+    FullTextIndexTestMixin, LikeAnalyticsViewTest
+):
+    """Runs the view tests with searches served by the FTS5 index."""
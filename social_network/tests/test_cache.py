@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import Post
+from tasks.post_creation_task import create_post
+from user.models import User
+
+
+class AnonymousResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="cached@example.com",
+            username="cached",
+            password="testpassword",
+        )
+        self.post = Post.objects.create(
+            owner=self.user, title="Cached", text="Cached #post"
+        )
+        self.other_post = Post.objects.create(
+            owner=self.user, title="Other", text="Other"
+        )
+        self.list_url = reverse("social_network:post-list")
+        self.detail_url = reverse(
+            "social_network:post-detail", args=[self.post.pk]
+        )
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def titles(self, params=None):
+        return [
+            post["title"]
+            for post in self.get(self.list_url, params)["results"]
+        ]
+
+    def test_repeated_requests_hit_the_cache(self):
+        for url in (
+            self.list_url,
+            self.detail_url,
+            reverse("social_network:tag-posts", args=["post"]),
+        ):
+            first = self.get(url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.get(url), first)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.assertEqual(self.titles(), ["Other", "Cached"])
+        self.assertEqual(self.titles({"page_size": 1}), ["Other"])
+        self.assertEqual(self.titles({"search": "cached"}), ["Cached"])
+
+    def test_authenticated_requests_skip_the_cache(self):
+        self.get(self.list_url)
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+        self.assertIn("liked_by_current_user", response.data["results"][0])
+
+    def test_post_changes_invalidate(self):
+        self.titles()
+        self.get(self.detail_url)
+        self.client.force_authenticate(user=self.user)
+        self.client.patch(self.detail_url, {"title": "Edited"})
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(self.titles(), ["Other", "Edited"])
+        self.assertEqual(self.get(self.detail_url)["title"], "Edited")
+
+        self.other_post.delete()
+        self.assertEqual(self.titles(), ["Edited"])
+
+    def test_scheduled_post_task_invalidates_lists(self):
+        self.titles()
+        create_post(self.user.pk, "Scheduled", "Scheduled")
+        self.assertEqual(self.titles()[0], "Scheduled")
+
+    def test_post_change_keeps_other_posts_cached(self):
+        self.get(self.detail_url)
+        self.other_post.title = "Edited"
+        self.other_post.save()
+        with self.assertNumQueries(0):
+            self.get(self.detail_url)
+
+    def test_username_change_invalidates_owner_posts(self):
+        self.get(self.detail_url)
+        self.user.username = "renamed"
+        self.user.save()
+        self.assertEqual(
+            self.get(self.detail_url)["owner"]["username"], "renamed"
+        )
+
+    def test_profile_change_keeps_owner_posts_cached(self):
+        self.get(self.detail_url)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(reverse("user:manage"), {"bio": "Bio"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(0):
+            self.get(self.detail_url)
@@ -0,0 +1,171 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from social_network.models import Post, Comment, Like, FeedEntry
+from user.models import User
+
+
+class RecountCountersCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="counter@example.com",
+            username="counter",
+            password="testpassword",
+        )
+        self.post = Post.objects.create(
+            owner=self.user, title="Test Post", text="This is a test post"
+        )
+        self.empty_post = Post.objects.create(
+            owner=self.user, title="Empty Post", text="Nobody cares"
+        )
+        self.post.likes.add(self.user)
+        Comment.objects.create(user=self.user, post=self.post, text="first")
+        Comment.objects.create(user=self.user, post=self.post, text="second")
+        self.followed = User.objects.create_user(
+            email="followed@example.com",
+            username="followed",
+            password="testpassword",
+        )
+        self.user.following.add(self.followed)
+        Post.objects.update(like_count=7, comment_count=7)
+        User.objects.update(
+            followers_count=7, following_count=7, posts_count=7
+        )
+
+    def test_recount_repairs_post_counters(self):
+        call_command("recount_counters", batch_size=1, stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.empty_post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.empty_post.like_count, 0)
+        self.assertEqual(self.empty_post.comment_count, 0)
+
+    def test_recount_repairs_user_counters(self):
+        call_command("recount_counters", stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.followed.refresh_from_db()
+        self.assertEqual(self.user.posts_count, 2)
+        self.assertEqual(self.user.following_count, 1)
+        self.assertEqual(self.user.followers_count, 0)
+        self.assertEqual(self.followed.followers_count, 1)
+        self.assertEqual(self.followed.posts_count, 0)
+
+
+class GenerateDataCommandTest(TestCase):
+    def generate(self, **options):
+        call_command(
+            "generate_data",
+            users=30,
+            follows=5,
+            posts=60,
+            likes=200,
+            comments=50,
+            batch_size=25,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_generated_counters_are_consistent(self):
+        self.generate()
+
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertTrue(Like.objects.exists())
+        self.assertTrue(Comment.objects.exists())
+        for post in Post.objects.all():
+            self.assertEqual(post.like_count, post.like_set.count())
+            self.assertEqual(post.comment_count, post.comments.count())
+        for user in User.objects.all():
+            self.assertEqual(user.followers_count, user.followers.count())
+            self.assertEqual(user.posts_count, user.posts.count())
+
+    def test_reactions_follow_their_posts(self):
+        self.generate()
+
+        for like in Like.objects.select_related("post"):
+            self.assertGreaterEqual(like.created_at, like.post.created_at)
+        for comment in Comment.objects.select_related("post"):
+            self.assertGreaterEqual(
+                comment.created_at, comment.post.created_at
+            )
+
+    def test_same_seed_generates_same_data(self):
+        self.generate(no_feed=True)
+        first = list(Post.objects.order_by("pk").values_list("title"))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+
+        self.generate(no_feed=True)
+        second = list(Post.objects.order_by("pk").values_list("title"))
+
+        self.assertEqual(first, second)
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_feeds_are_built(self):
+        self.generate()
+
+        follow = User.following.through.objects.first()
+        post = Post.objects.filter(owner_id=follow.to_user_id).first()
+        if post is not None:
+            self.assertTrue(
+                FeedEntry.objects.filter(
+                    user_id=follow.from_user_id, post=post
+                ).exists()
+            )
+
+
+class BenchEndpointsCommandTest(TestCase):
+    def test_every_endpoint_is_benchmarked(self):
+        call_command(
+            "generate_data",
+            users=10,
+            posts=20,
+            likes=40,
+            comments=20,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command("bench_endpoints", requests=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertNotIn("Not benchmarked", output)
+        self.assertIn("GET feed", output)
+        self.assertIn("GET users", output)
+        # writes of the benchmark are rolled back
+        self.assertFalse(User.objects.filter(username="bench0").exists())
+
+    def test_empty_database_is_reported(self):
+        with self.assertRaises(CommandError):
+            call_command("bench_endpoints", requests=1, stdout=StringIO())
+
+
+class BenchRenderersCommandTest(TestCase):
+    def test_renderers_are_compared(self):
+        out = StringIO()
+        with self.assertNumQueries(0):
+            call_command("bench_renderers", posts=10, repeat=2, stdout=out)
+
+        output = out.getvalue()
+        for name in ("render json", "render orjson", "parse orjson"):
+            self.assertIn(name, output)
+
+
+class BenchPostCreationCommandTest(TestCase):
+    def test_modes_are_compared_and_rolled_back(self):
+        out = StringIO()
+
+        call_command(
+            "bench_post_creation", posts=6, batch_size=4, owners=2, stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn("create_post:", output)
+        self.assertIn("create_posts:", output)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import Post, Comment
+from user.models import User
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="etag@example.com", username="etag", password="password"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", username="other", password="password"
+        )
+        self.post = Post.objects.create(
+            owner=self.other, title="Tagged", text="Tagged"
+        )
+        self.comment = Comment.objects.create(
+            user=self.other, post=self.post, text="First"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.urls = {
+            "posts": reverse("social_network:post-list"),
+            "post": reverse("social_network:post-detail", args=[self.post.pk]),
+            "comments": reverse(
+                "social_network:comment-list", args=[self.post.pk]
+            ),
+            "user": reverse("user:user-detail", kwargs={"id": self.other.pk}),
+            "me": reverse("user:manage"),
+        }
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        return response["ETag"]
+
+    def test_unchanged_resources_are_not_modified(self):
+        for name, url in self.urls.items():
+            etag = self.etag(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(
+                response.status_code, status.HTTP_304_NOT_MODIFIED, name
+            )
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.urls["post"])
+        response = self.client.get(
+            self.urls["post"],
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_users_get_their_own_etags(self):
+        etag = self.etag(self.urls["post"])
+        self.client.force_authenticate(user=self.other)
+        self.assertNotEqual(self.etag(self.urls["post"]), etag)
+
+    def assertChanges(self, names, change):
+        etags = {name: self.etag(self.urls[name]) for name in self.urls}
+        change()
+        changed = {
+            name
+            for name, etag in etags.items()
+            if self.etag(self.urls[name]) != etag
+        }
+        self.assertEqual(changed, set(names))
+
+    def test_like_changes_posts(self):
+        url = reverse("social_network:post-like", args=[self.post.pk])
+        self.assertChanges({"posts", "post"}, lambda: self.client.put(url))
+
+    def test_comment_changes_comments_and_counters(self):
+        self.assertChanges(
+            {"posts", "post", "comments"},
+            lambda: self.client.post(self.urls["comments"], {"text": "Hi"}),
+        )
+
+        def edit():
+            self.comment.text = "Edited"
+            self.comment.save()
+
+        self.assertChanges({"comments"}, edit)
+
+    def test_follow_changes_profiles(self):
+        self.assertChanges(
+            {"user", "me"}, lambda: self.client.post(self.urls["user"])
+        )
+
+    def test_username_change_changes_posts_and_comments(self):
+        def rename():
+            self.other.username = "renamed"
+            self.other.save()
+
+        self.assertChanges({"posts", "post", "comments", "user"}, rename)
@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import Post, FeedEntry
+from tasks.feed_task import fan_out_latest_posts
+
+
+class FeedViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.reader = get_user_model().objects.create_user(
+            email="reader@test.com", username="reader", password="password"
+        )
+        self.author = get_user_model().objects.create_user(
+            email="author@test.com", username="author", password="password"
+        )
+        self.stranger = get_user_model().objects.create_user(
+            email="stranger@test.com", username="stranger", password="password"
+        )
+        self.url = reverse("social_network:feed")
+
+    def follow(self, user):
+        self.client.force_authenticate(user=self.reader)
+        return self.client.post(
+            reverse("user:user-detail", kwargs={"id": user.id})
+        )
+
+    def publish(self, user, title):
+        self.client.force_authenticate(user=user)
+        self.client.post(
+            reverse("social_network:post-list"),
+            {"title": title, "text": "text"},
+        )
+        return Post.objects.get(title=title)
+
+    def read_feed(self, **params):
+        self.client.force_authenticate(user=self.reader)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_feed_requires_authentication(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_posts_are_fanned_out_on_write(self):
+        self.follow(self.author)
+        post = self.publish(self.author, "Fresh post")
+        self.publish(self.stranger, "Unrelated post")
+
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        titles = [item["title"] for item in self.read_feed().data["results"]]
+        self.assertEqual(titles, ["Fresh post"])
+
+    def test_follow_backfills_and_unfollow_removes_posts(self):
+        self.publish(self.author, "Old post")
+        self.follow(self.author)
+        self.assertEqual(len(self.read_feed().data["results"]), 1)
+
+        self.follow(self.author)
+        self.assertEqual(self.read_feed().data["results"], [])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=1)
+    def test_popular_authors_are_merged_on_read(self):
+        self.follow(self.author)
+        self.follow(self.stranger)
+        self.publish(self.author, "Popular 1")
+        self.publish(self.author, "Popular 2")
+        self.stranger.followers_count = 0
+        self.stranger.save()
+        self.publish(self.stranger, "Regular")
+
+        self.assertFalse(
+            FeedEntry.objects.filter(post__owner=self.author).exists()
+        )
+        titles = []
+        response = self.read_feed(page_size=1)
+        while True:
+            titles.extend(item["title"] for item in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(titles, ["Regular", "Popular 2", "Popular 1"])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=2)
+    def test_author_dropping_below_the_limit_is_fanned_out(self):
+        url = reverse("user:user-detail", kwargs={"id": self.author.id})
+        self.follow(self.author)
+        self.client.force_authenticate(user=self.stranger)
+        self.client.post(url)
+        post = self.publish(self.author, "Popular")
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+
+        self.client.force_authenticate(user=self.stranger)
+        # the task runs in process instead of going through the broker
+        with mock.patch.object(
+            fan_out_latest_posts, "delay", side_effect=fan_out_latest_posts
+        ), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url)
+
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.stranger, post=post).exists()
+        )
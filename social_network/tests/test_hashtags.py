@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.hashtags import extract_hashtags
+from social_network.models import Post, PostHashtag
+
+
+class ExtractHashtagsTest(TestCase):
+    def test_hashtags_are_lowercased_and_deduplicated(self):
+        self.assertEqual(
+            extract_hashtags("Reading #Books", "more #books and #sci_fi!"),
+            {"books", "sci_fi"},
+        )
+
+    def test_text_without_hashtags(self):
+        self.assertEqual(extract_hashtags("plain text", None), set())
+
+
+class HashtagIndexTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="tagger@test.com", username="tagger", password="password"
+        )
+        self.post = Post.objects.create(
+            owner=self.user, title="Weekend #books", text="and #coffee"
+        )
+        Post.objects.create(owner=self.user, title="Other", text="#coffee")
+
+    def tag_names(self, post):
+        return set(post.hashtags.values_list("name", flat=True))
+
+    def test_hashtags_are_indexed_on_save(self):
+        self.assertEqual(self.tag_names(self.post), {"books", "coffee"})
+
+        self.post.text = "and #tea"
+        self.post.save()
+        self.assertEqual(self.tag_names(self.post), {"books", "tea"})
+
+    def test_filter_posts_by_tag(self):
+        url = reverse("social_network:post-list")
+        response = self.client.get(url, {"tag": "#Books"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_tag_posts_endpoint(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:tag-posts", kwargs={"name": "coffee"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_backfill_command(self):
+        PostHashtag.objects.all().delete()
+        call_command("index_hashtags", batch_size=1, stdout=StringIO())
+        self.assertEqual(self.tag_names(self.post), {"books", "coffee"})
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import MediaBlob, Post, ScheduledPost
+from tasks.scheduled_post_task import publish_scheduled_posts
+from tasks.thumbnail_task import create_thumbnails
+from user.models import User
+
+
+class ContentAddressedMediaTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # thumbnails are covered in test_thumbnails
+        patcher = mock.patch.object(create_thumbnails, "delay")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="uploader@example.com",
+            username="uploader",
+            password="testpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("social_network:post-list")
+
+    def upload(self, data, filename="meme.png", **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                {
+                    "title": filename,
+                    "text": "text",
+                    "content": SimpleUploadedFile(filename, data),
+                    **extra,
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def stored_files(self):
+        return [
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root)
+            for name in names
+        ]
+
+    def delete(self, post):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                reverse("social_network:post-detail", args=[post.pk])
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_content_is_stored_under_its_digest(self):
+        self.upload(b"meme bytes", "Meme.PNG")
+
+        digest = hashlib.sha256(b"meme bytes").hexdigest()
+        name = f"post_content/{digest[:2]}/{digest[2:4]}/{digest}.png"
+        self.assertEqual(Post.objects.get().content.name, name)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(
+            (blob.name, blob.sha256, blob.size, blob.ref_count),
+            (name, digest, 10, 1),
+        )
+        with open(os.path.join(self.media_root, name), "rb") as file:
+            self.assertEqual(file.read(), b"meme bytes")
+
+    def test_duplicate_uploads_share_one_file(self):
+        self.upload(b"meme bytes", "first.png")
+        self.upload(b"meme bytes", "repost.png")
+        self.upload(b"other bytes", "other.png")
+
+        self.assertEqual(Post.objects.values("content").distinct().count(), 2)
+        self.assertEqual(len(self.stored_files()), 2)
+        self.assertEqual(
+            sorted(MediaBlob.objects.values_list("ref_count", flat=True)),
+            [1, 2],
+        )
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_large_uploads_are_moved_from_the_temporary_file(self):
+        data = os.urandom(300 * 1024)
+        self.upload(data, "video.mp4")
+
+        with Post.objects.get().content.open("rb") as file:
+            self.assertEqual(file.read(), data)
+
+    def test_file_is_deleted_with_the_last_reference(self):
+        self.upload(b"meme bytes", "first.png")
+        self.upload(b"meme bytes", "repost.png")
+        first, repost = Post.objects.order_by("id")
+
+        self.delete(first)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        self.assertEqual(len(self.stored_files()), 1)
+
+        self.delete(repost)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_replacing_content_releases_the_old_file(self):
+        self.upload(b"old bytes", "old.png")
+        post = Post.objects.get()
+        url = reverse("social_network:post-detail", args=[post.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                url, {"content": SimpleUploadedFile("new.png", b"new bytes")}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        blob = MediaBlob.objects.get()
+        new_digest = hashlib.sha256(b"new bytes").hexdigest()
+        self.assertEqual((blob.sha256, blob.ref_count), (new_digest, 1))
+        self.assertEqual(len(self.stored_files()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                url, {"content": SimpleUploadedFile("new.png", b"new bytes")}
+            )
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+    def test_published_scheduled_post_keeps_the_reference(self):
+        self.upload(
+            b"scheduled bytes",
+            "later.png",
+            scheduled_time=(timezone.now() + timedelta(hours=1)).isoformat(),
+        )
+        ScheduledPost.objects.update(publish_at=timezone.now())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_scheduled_posts()
+
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertEqual(Post.objects.get().content.name, blob.name)
+        self.assertEqual(len(self.stored_files()), 1)
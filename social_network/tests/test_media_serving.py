@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from app.media import parse_range, RangeNotSatisfiable
+
+DATA = bytes(range(256)) * 4
+
+
+class ParseRangeTest(TestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1024), (0, 99))
+        self.assertEqual(parse_range("bytes=1000-", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=1000-5000", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=-24", 1024), (1000, 1023))
+        self.assertEqual(parse_range("bytes=-5000", 1024), (0, 1023))
+
+    def test_other_ranges_send_the_whole_file(self):
+        for header in ("bytes=0-1,5-6", "bytes=9-1", "items=0-1", "bytes=-"):
+            self.assertIsNone(parse_range(header, 1024), header)
+
+    def test_ranges_past_the_end_are_unsatisfiable(self):
+        for header in ("bytes=1024-", "bytes=-0"):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1024)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range("bytes=-10", 0)
+
+
+class ServeMediaTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_SENDFILE=None
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        os.makedirs(os.path.join(self.media_root, "post_content"))
+        self.path = os.path.join(self.media_root, "post_content", "clip.mp4")
+        with open(self.path, "wb") as file:
+            file.write(DATA)
+        self.url = reverse("media", args=["post_content/clip.mp4"])
+
+    @staticmethod
+    def body(response):
+        return b"".join(response.streaming_content)
+
+    def test_whole_file_is_streamed_with_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), DATA)
+        self.assertEqual(response["Content-Type"], "video/mp4")
+        self.assertEqual(response["Content-Length"], str(len(DATA)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(
+            response["Last-Modified"],
+            http_date(int(os.stat(self.path).st_mtime)),
+        )
+        self.assertTrue(response["ETag"])
+
+    def test_byte_ranges(self):
+        for header, start, end in (
+            ("bytes=10-19", 10, 19),
+            ("bytes=1000-", 1000, 1023),
+            ("bytes=-4", 1020, 1023),
+        ):
+            response = self.client.get(self.url, HTTP_RANGE=header)
+
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(self.body(response), DATA[start : end + 1])
+            self.assertEqual(
+                response["Content-Range"], f"bytes {start}-{end}/{len(DATA)}"
+            )
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(DATA)}")
+
+    def test_if_range_of_a_changed_file_sends_it_whole(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag
+        )
+        self.assertEqual(response.status_code, 206)
+
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"outdated"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), DATA)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+
+        not_modified = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        not_modified = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        os.utime(self.path, (0, 0))
+        self.assertEqual(
+            self.client.get(
+                self.url, HTTP_IF_NONE_MATCH=response["ETag"]
+            ).status_code,
+            200,
+        )
+
+    def test_head_sends_no_body(self):
+        response = self.client.head(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Length"], str(len(DATA)))
+
+    def test_missing_files_and_other_paths_are_not_found(self):
+        for path in ("post_content/missing.mp4", "post_content", "../etc"):
+            response = self.client.get(reverse("media", args=[path]))
+            self.assertEqual(response.status_code, 404, path)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    @override_settings(MEDIA_SENDFILE="x-accel-redirect")
+    def test_nginx_sends_the_file(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            "/protected-media/post_content/clip.mp4",
+        )
+        self.assertEqual(response["Content-Type"], "video/mp4")
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_apache_sends_the_file(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Sendfile"], self.path)
+        self.assertTrue(response["ETag"])
@@ -1,3 +1,4 @@
+from django.db import IntegrityError
 from django.test import TestCase
 from django.utils import timezone
 from user.models import User
@@ -49,6 +50,10 @@ class LikeModelTest(BaseModelTest):
         )
         self.assertEqual(str(self.like), expected_str)
 
+    def test_user_likes_post_once(self):
+        with self.assertRaises(IntegrityError):
+            Like.objects.create(user=self.user, post=self.post)
+
 
 class CommentModelTest(BaseModelTest):
     def test_comment_creation(self):
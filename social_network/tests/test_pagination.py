@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import Post
+
+
+class PostCursorPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="pager@test.com",
+            username="pager",
+            password="pagerpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        created_at = timezone.now()
+        self.posts = [
+            Post.objects.create(
+                owner=self.user, title=f"Post {index}", text="text"
+            )
+            for index in range(5)
+        ]
+        # identical timestamps make `id` the only tie-breaker
+        Post.objects.update(created_at=created_at)
+        self.url = reverse("social_network:post-list")
+
+    def collect_ids(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_pages_follow_created_at_and_id(self):
+        ids = self.collect_ids(f"{self.url}?page_size=2")
+        expected = sorted((post.id for post in self.posts), reverse=True)
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_user_posts_are_paginated(self):
+        url = reverse("user:user-posts", kwargs={"id": self.user.id})
+        self.assertEqual(len(self.collect_ids(f"{url}?page_size=2")), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
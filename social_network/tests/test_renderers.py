@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app.renderers import FastJSONParser, FastJSONRenderer
+from user.models import User
+
+
+class FastJSONTest(TestCase):
+    data = {
+        "text": "Ünïcode line",
+        "created_at": datetime(2026, 6, 1, 12, 30, 15, 123456, timezone.utc),
+        "price": Decimal("1.50"),
+        "label": gettext_lazy("Not found."),
+        "nested": [{"id": 1, "empty": None, "flag": True}],
+        "huge": 2**70,
+    }
+
+    def test_renders_like_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_indented_output_falls_back(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, "application/json; indent=4"),
+            JSONRenderer().render(self.data, "application/json; indent=4"),
+        )
+
+    def test_parses_like_json_parser(self):
+        body = JSONRenderer().render(self.data)
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)),
+            JSONParser().parse(BytesIO(body)),
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b"{'single': 'quotes'}"))
+
+    def test_api_uses_fast_json(self):
+        user = User.objects.create_user(
+            email="json@example.com", username="json", password="password"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("social_network:post-list")
+
+        response = client.post(
+            url,
+            b'{"title": "Fast", "text": "JSON"',
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.post(
+            url, {"title": "Fast", "text": "JSON"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = client.get(url)
+        self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(response.json()["results"][0]["title"], "Fast")
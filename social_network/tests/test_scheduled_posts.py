@@ -0,0 +1,185 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import FeedEntry, Post, ScheduledPost
+from tasks.post_creation_task import create_post, create_posts
+from tasks.scheduled_post_task import publish_scheduled_posts
+from user.models import User
+
+
+class ScheduledPostTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="scheduler@example.com",
+            username="scheduler",
+            password="testpassword",
+        )
+        self.follower = User.objects.create_user(
+            email="follower@example.com",
+            username="follower",
+            password="testpassword",
+        )
+        self.follower.following.add(self.user)
+        self.url = reverse("social_network:post-list")
+
+    def schedule(self, publish_at, title="Scheduled", text="Later #news"):
+        return ScheduledPost.objects.create(
+            owner=self.user, title=title, text=text, publish_at=publish_at
+        )
+
+    def test_scheduling_stores_the_post_until_it_is_due(self):
+        self.client.force_authenticate(user=self.user)
+        publish_at = timezone.now() + timedelta(hours=1)
+        with override_settings(MEDIA_ROOT=self.media_root):
+            response = self.client.post(
+                self.url,
+                {
+                    "title": "Later",
+                    "text": "Later",
+                    "scheduled_time": publish_at.isoformat(),
+                    "content": SimpleUploadedFile("later.txt", b"later"),
+                },
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Post.objects.exists())
+        scheduled = ScheduledPost.objects.get()
+        self.assertEqual(scheduled.owner, self.user)
+        self.assertEqual(scheduled.publish_at, publish_at)
+        self.assertTrue(scheduled.content.name.startswith("post_content/"))
+
+    def test_scheduling_in_the_past_is_rejected(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            self.url,
+            {
+                "title": "Late",
+                "text": "Late",
+                "scheduled_time": (
+                    timezone.now() - timedelta(minutes=1)
+                ).isoformat(),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ScheduledPost.objects.exists())
+
+    def test_task_publishes_due_posts_only(self):
+        due = self.schedule(timezone.now() - timedelta(minutes=1))
+        later = self.schedule(timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(publish_scheduled_posts(), 1)
+
+        post = Post.objects.get()
+        self.assertEqual((post.owner, post.title), (due.owner, due.title))
+        self.assertEqual(list(ScheduledPost.objects.all()), [later])
+        self.assertEqual(publish_scheduled_posts(), 0)
+
+    @override_settings(SCHEDULED_POST_BATCH_SIZE=2)
+    def test_task_publishes_in_batches_with_side_effects(self):
+        for number in range(5):
+            self.schedule(
+                timezone.now() - timedelta(minutes=number),
+                title=f"Post {number}",
+            )
+
+        self.assertEqual(publish_scheduled_posts(), 5)
+
+        self.assertFalse(ScheduledPost.objects.exists())
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.posts_count, 5)
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.follower).count(), 5
+        )
+        self.assertEqual(Post.objects.filter(hashtags__name="news").count(), 5)
+
+    def test_task_invalidates_cached_lists(self):
+        self.assertEqual(self.client.get(self.url).data["results"], [])
+        self.schedule(timezone.now())
+        publish_scheduled_posts()
+
+        titles = [
+            post["title"] for post in self.client.get(self.url).data["results"]
+        ]
+        self.assertEqual(titles, ["Scheduled"])
+
+
+class CreatePostsTaskTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email="author@example.com", username="author", password="pass"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", username="other", password="pass"
+        )
+        self.follower = User.objects.create_user(
+            email="follower@example.com", username="follower", password="pass"
+        )
+        self.follower.following.add(self.author, self.other)
+
+    @staticmethod
+    def items(*owners):
+        return [
+            {"owner_id": owner.pk, "title": f"Post {number}", "text": "#batch"}
+            for number, owner in enumerate(owners)
+        ]
+
+    def test_batch_publishes_posts_with_side_effects(self):
+        post_ids = create_posts(
+            self.items(self.author, self.author, self.other)
+        )
+
+        self.assertEqual(
+            sorted(post_ids), sorted(Post.objects.values_list("pk", flat=True))
+        )
+        self.author.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(
+            (self.author.posts_count, self.other.posts_count), (2, 1)
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.follower).count(), 3
+        )
+        self.assertEqual(
+            Post.objects.filter(hashtags__name="batch").count(), 3
+        )
+
+    def test_items_of_missing_owners_are_skipped(self):
+        items = self.items(self.author)
+        items.append({"owner_id": 0, "title": "Orphan", "text": "Orphan"})
+
+        self.assertEqual(len(create_posts(items)), 1)
+        self.assertEqual(
+            list(Post.objects.values_list("title", flat=True)), ["Post 0"]
+        )
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        # posts per owner are equal, so counters take one update
+        with self.assertNumQueries(12):
+            create_posts(self.items(self.author, self.other))
+        with self.assertNumQueries(12):
+            create_posts(self.items(*[self.author, self.other] * 20))
+
+    def test_single_post_task_uses_the_batch(self):
+        create_post(self.author.pk, "Single", "Single")
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.posts_count, 1)
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.follower, post__title="Single"
+            ).exists()
+        )
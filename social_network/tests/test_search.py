@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network.models import Post
+from social_network.search import FullTextIndex, post_search_index
+from user.search import user_search_index
+
+
+class FullTextIndexTestMixin:
+    def setUp(self):
+        super().setUp()
+        for index in (post_search_index, user_search_index):
+            index.create(connection)
+            self.addCleanup(index.drop, connection)
+        if not post_search_index.is_available():
+            self.skipTest("SQLite FTS5 is not available")
+
+
+class MatchExpressionTest(TestCase):
+    def test_words_become_quoted_prefixes(self):
+        self.assertEqual(
+            FullTextIndex.match_expression('Kafka "penal'),
+            '"Kafka"* "penal"*',
+        )
+
+    def test_columns_restrict_the_match(self):
+        self.assertEqual(
+            FullTextIndex.match_expression("doe", ("username", "email")),
+            '{username email} : ("doe"*)',
+        )
+
+    def test_input_without_words(self):
+        self.assertIsNone(FullTextIndex.match_expression("*:-"))
+
+
+class PostSearchTest(FullTextIndexTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="searcher@test.com",
+            username="searcher",
+            password="password",
+            first_name="Franz",
+            last_name="Kafka",
+        )
+        self.best = Post.objects.create(
+            owner=self.user,
+            title="Penal colony",
+            text="The penal colony, a penal story",
+        )
+        self.other = Post.objects.create(
+            owner=self.user, title="Castle", text="Not quite penal"
+        )
+        Post.objects.create(owner=self.user, title="Trial", text="Court")
+        self.url = reverse("social_network:post-list")
+
+    def test_search_ranks_and_matches_prefixes(self):
+        response = self.client.get(self.url, {"search": "pena"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [item["title"] for item in response.data["results"]]
+        self.assertEqual(titles, ["Penal colony", "Castle"])
+
+    def test_ranked_results_are_paginated(self):
+        response = self.client.get(self.url, {"search": "penal", "page_size": 1})
+        second = self.client.get(response.data["next"])
+        self.assertEqual(second.data["results"][0]["title"], "Castle")
+        self.assertIsNone(second.data["next"])
+
+    def test_ranked_pages_survive_index_changes(self):
+        response = self.client.get(
+            self.url, {"search": "penal", "page_size": 1}
+        )
+        # new rows shift every bm25 score, the rank of the first page
+        # isn't a boundary of the second one anymore
+        for index in range(10):
+            Post.objects.create(owner=self.user, title="Filler", text="Text")
+        second = self.client.get(response.data["next"])
+        self.assertEqual(second.data["results"][0]["title"], "Castle")
+        first = self.client.get(second.data["previous"])
+        self.assertEqual(first.data["results"][0]["title"], "Penal colony")
+
+    def test_like_analytics_of_searched_posts(self):
+        self.best.text += " #kafka"
+        self.best.save()
+        for post in Post.objects.all():
+            post.likes.add(self.user)
+        url = reverse("social_network:post-like-analytics")
+        # the tag joins hashtags, so Django aliases the post table
+        response = self.client.get(url, {"search": "penal", "tag": "kafka"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_likes"], 1)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.text = "Only a castle"
+        self.other.save()
+        self.best.delete()
+        response = self.client.get(self.url, {"search": "penal"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_users(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("user:user-list")
+        response = self.client.get(url, {"search": "kaf"})
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get(url, {"email": "searcher@test"})
+        self.assertEqual(len(response.data["results"]), 1)
@@ -72,7 +72,10 @@ class PostSerializerTest(TestCase):
             "created_at": self.post.created_at.astimezone(self.tz).isoformat(),
             "text": self.post_text,
             "content": None,
+            "thumbnail": None,
             "liked_by_current_user": False,
+            "like_count": 0,
+            "comment_count": 0,
             "edited": False,
             "comments": (
                 f"http://testserver/api/social_network/posts/"
@@ -0,0 +1,179 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from social_network import thumbnails
+from social_network.models import Post
+from tasks.thumbnail_task import create_thumbnails
+from user.models import User
+
+
+def image_bytes(size=(1200, 800), image_format="PNG", mode="RGB", color="red"):
+    output = BytesIO()
+    Image.new(mode, size, color).save(output, image_format)
+    return output.getvalue()
+
+
+class ThumbnailTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # tasks run in process instead of going through the broker
+        self.delay = mock.patch.object(
+            create_thumbnails, "delay", side_effect=create_thumbnails
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="artist@example.com",
+            username="artist",
+            password="testpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, filename, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("social_network:post-list"),
+                {
+                    "title": filename,
+                    "text": "text",
+                    "content": SimpleUploadedFile(filename, data),
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(title=filename)
+
+    def add_post_without_signals(self, filename, data):
+        """A post stored before thumbnails existed."""
+        post = Post.objects.create(owner=self.user, title="old", text="old")
+        name = Post.content.field.storage.save(
+            f"post_content/{filename}", ContentFile(data)
+        )
+        Post.objects.filter(pk=post.pk).update(content=name)
+        return post
+
+    def test_uploaded_image_gets_a_webp_thumbnail(self):
+        post = self.create_post("photo.jpg", image_bytes(image_format="JPEG"))
+
+        post.refresh_from_db()
+        self.assertEqual(
+            post.thumbnail.name,
+            thumbnails.thumbnail_name("post", post.content.name),
+        )
+        self.assertTrue(post.thumbnail.name.endswith(".webp"))
+        with post.thumbnail.open("rb"), Image.open(post.thumbnail) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (640, 427))
+
+        response = self.client.get(
+            reverse("social_network:post-detail", args=[post.pk])
+        )
+        self.assertTrue(
+            response.data["thumbnail"].endswith(post.thumbnail.name)
+        )
+
+    def test_unreachable_broker_does_not_fail_the_upload(self):
+        self.delay.side_effect = OperationalError("broker is down")
+        with self.assertLogs(level="ERROR"):
+            post = self.create_post(
+                "photo.jpg", image_bytes(image_format="JPEG")
+            )
+        self.assertFalse(post.thumbnail)
+
+    def test_transparency_is_kept(self):
+        post = self.create_post(
+            "logo.png",
+            image_bytes(mode="RGBA", size=(100, 100), color=(255, 0, 0, 128)),
+        )
+
+        post.refresh_from_db()
+        with post.thumbnail.open("rb"), Image.open(post.thumbnail) as image:
+            self.assertEqual((image.mode, image.size), ("RGBA", (100, 100)))
+
+    def test_other_and_broken_files_get_no_thumbnail(self):
+        video = self.create_post("clip.mp4", b"not really a video")
+        broken = self.create_post("broken.png", b"not really an image")
+
+        self.delay.assert_called_once_with("post", [broken.pk])
+        for post in (video, broken):
+            post.refresh_from_db()
+            self.assertFalse(post.thumbnail)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_root, "thumbnails"))
+        )
+
+    def test_same_content_renders_one_thumbnail(self):
+        data = image_bytes()
+        first = self.create_post("first.png", data)
+        second = self.create_post("second.png", data)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.thumbnail.name, second.thumbnail.name)
+        self.assertEqual(self.delay.call_count, 2)
+
+    def test_profile_picture_gets_a_thumbnail(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("user:manage"),
+                {"picture": SimpleUploadedFile("me.png", image_bytes())},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        with self.user.picture_thumbnail.open("rb"), Image.open(
+            self.user.picture_thumbnail
+        ) as image:
+            self.assertEqual(image.size, (160, 107))
+        response = self.client.get(reverse("user:manage"))
+        self.assertTrue(
+            response.data["picture_thumbnail"].endswith(
+                self.user.picture_thumbnail.name
+            )
+        )
+
+    def test_command_backfills_existing_files(self):
+        post = self.add_post_without_signals("old.png", image_bytes())
+        self.add_post_without_signals("old.txt", b"text")
+        out = StringIO()
+
+        call_command("generate_thumbnails", kind=["post"], stdout=out)
+
+        self.assertIn("Updated 1 of 1 post thumbnails", out.getvalue())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Updated 0 of 0 post thumbnails", out.getvalue())
+
+    @override_settings(THUMBNAIL_SIZES={"post": (64, 64)})
+    def test_command_queues_thumbnails_of_changed_sizes(self):
+        post = self.add_post_without_signals("old.png", image_bytes())
+        Post.objects.filter(pk=post.pk).update(
+            thumbnail="thumbnails/640x640/post_content/old.webp"
+        )
+        self.delay.side_effect = None
+
+        call_command(
+            "generate_thumbnails", kind=["post"], queue=True, stdout=StringIO()
+        )
+
+        self.delay.assert_called_once_with("post", [post.pk])
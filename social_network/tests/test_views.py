@@ -1,10 +1,14 @@
 from collections import OrderedDict
+from unittest import mock
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from social_network.models import Post, Comment
+from social_network import likes
+from social_network.models import Post, Comment, Like
 
 
 class PostViewSetTestCase(TestCase):
@@ -43,6 +47,20 @@ class PostViewSetTestCase(TestCase):
             Post.objects.latest("created_at").title, self.test_new_title
         )
 
+    def test_create_and_delete_post_update_posts_count(self):
+        self.client.force_authenticate(user=self.user)
+        data = {"title": self.test_new_title, "text": "This is a new post"}
+        self.client.post(self.url, data)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.posts_count, 1)
+
+        new_post = Post.objects.get(title=self.test_new_title)
+        self.client.delete(
+            reverse("social_network:post-detail", args=[new_post.id])
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.posts_count, 0)
+
     def test_create_post_unauthenticated(self):
         data = {"title": self.test_new_title, "text": "This is a new post"}
         response = self.client.post(self.url, data)
@@ -102,11 +120,203 @@ class PostViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["liked"], False)
 
+    def test_like_post_updates_like_count(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:post-like", args=[self.post.id])
+        self.client.post(url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        self.client.post(url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_put_and_delete_like_are_idempotent(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:post-like", args=[self.post.id])
+
+        for _ in range(2):
+            response = self.client.put(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["liked"], True)
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.like_count, 1)
+            self.assertEqual(self.post.likes.count(), 1)
+
+        for _ in range(2):
+            response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["liked"], False)
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.like_count, 0)
+            self.assertFalse(self.post.likes.exists())
+
+    def test_like_missing_post(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:post-like", args=[self.post.id + 1])
+        for method in (self.client.post, self.client.put, self.client.delete):
+            self.assertEqual(
+                method(url).status_code, status.HTTP_404_NOT_FOUND
+            )
+
+    def test_bulk_like_and_unlike(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:bulk-like")
+        posts = [
+            Post.objects.create(owner=self.admin, title=f"Post {index}")
+            for index in range(3)
+        ]
+        posts[0].likes.add(self.user)
+        missing = posts[-1].id + 1
+
+        response = self.client.post(
+            url,
+            {
+                "like": [posts[0].id, posts[1].id, missing],
+                "unlike": [posts[2].id],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"post": posts[0].id, "liked": True, "changed": False},
+                {"post": posts[1].id, "liked": True, "changed": True},
+                {"post": missing, "error": "Not found."},
+                {"post": posts[2].id, "liked": False, "changed": False},
+            ],
+        )
+        posts[1].refresh_from_db()
+        self.assertEqual(posts[1].like_count, 1)
+
+        response = self.client.post(
+            url, {"unlike": [posts[1].id]}, format="json"
+        )
+        self.assertTrue(response.data["results"][0]["changed"])
+        posts[1].refresh_from_db()
+        self.assertEqual(posts[1].like_count, 0)
+        self.assertFalse(posts[1].likes.exists())
+
+    def test_bulk_like_query_count_does_not_grow(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:bulk-like")
+        posts = [
+            Post.objects.create(owner=self.admin, title=f"Post {index}")
+            for index in range(10)
+        ]
+
+        def count_queries(data):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        # rollups are shifted with one update per distinct delta
+        two_posts = count_queries({"like": [post.id for post in posts[:2]]})
+        self.assertEqual(
+            count_queries({"like": [post.id for post in posts[2:]]}),
+            two_posts,
+        )
+
+    def test_bulk_like_skips_likes_inserted_concurrently(self):
+        posts = [
+            Post.objects.create(owner=self.admin, title=f"Post {index}")
+            for index in range(2)
+        ]
+        bulk_create = Like.objects.bulk_create
+
+        def like_concurrently_first(objs, **kwargs):
+            Like.objects.create(user=self.user, post=posts[0])
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(
+            Like.objects, "bulk_create", side_effect=like_concurrently_first
+        ):
+            liked = likes.like_many(
+                self.user, {post.id: post.owner_id for post in posts}
+            )
+
+        self.assertEqual(liked, {posts[1].id})
+        # the concurrent request counts its own like
+        for post, like_count in zip(posts, (0, 1)):
+            post.refresh_from_db()
+            self.assertEqual(post.like_count, like_count)
+
+    def test_bulk_like_invalid_input(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("social_network:bulk-like")
+        for data in (
+            {},
+            {"like": [self.post.id], "unlike": [self.post.id]},
+            {"like": ["first"]},
+            {"like": list(range(1, 202))},
+        ):
+            response = self.client.post(url, data, format="json")
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, data
+            )
+
     def test_like_post_unauthenticated(self):
         url = reverse("social_network:post-like", args=[self.post.id])
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_list_posts_liked_by_current_user(self):
+        self.post.likes.add(self.user)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertTrue(response.data["results"][0]["liked_by_current_user"])
+
+    def test_list_posts_query_count_does_not_grow_with_page(self):
+        self.client.force_authenticate(user=self.user)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        single_post_queries = count_queries()
+        self.assertGreater(single_post_queries, 0)
+        for index in range(10):
+            post = Post.objects.create(
+                owner=self.user, title=f"Post {index}", text="text"
+            )
+            post.likes.add(self.user)
+
+        self.assertEqual(count_queries(), single_post_queries)
+
+    def test_sparse_fieldsets(self):
+        self.client.force_authenticate(user=self.user)
+
+        def get(params):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data["results"][0], context.captured_queries
+
+        post, _ = get({"fields": "id,title"})
+        self.assertEqual(set(post), {"id", "title"})
+
+        post, queries = get({"omit": "owner,liked_by_current_user"})
+        self.assertNotIn("owner", post)
+        self.assertIn("text", post)
+        self.assertNotIn("JOIN", queries[0]["sql"])
+        self.assertNotIn("EXISTS", queries[0]["sql"])
+
+        response = self.client.get(self.url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sparse_fieldsets_ignored_on_writes(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.patch(
+            f"{self.detail_url}?fields=id", {"title": "Renamed"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Renamed")
+
     def test_search_posts(self):
         url = f"{self.url}?search=tEst"
         response = self.client.get(url)
@@ -121,7 +331,10 @@ class PostViewSetTestCase(TestCase):
                             [
                                 ("id", self.user.id),
                                 ("username", self.user.username),
-                                ("url", "http://testserver/api/user/5/"),
+                                (
+                                    "url",
+                                    f"http://testserver/api/user/{self.user.id}/",
+                                ),
                             ]
                         ),
                     ),
@@ -129,8 +342,8 @@ class PostViewSetTestCase(TestCase):
             )
         ]
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data, expected_data)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"], expected_data)
 
 
 class CommentViewSetTestCase(TestCase):
@@ -172,12 +385,73 @@ class CommentViewSetTestCase(TestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_list_comments_oldest_first_in_pages(self):
+        self.client.force_authenticate(user=self.user2)
+        for index in range(4):
+            Comment.objects.create(
+                user=self.user1, post=self.post, text=f"Reply {index}"
+            )
+
+        texts = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            texts += [comment["text"] for comment in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(
+            texts, ["Test comment"] + [f"Reply {index}" for index in range(4)]
+        )
+
+    def test_list_comments_query_count_does_not_grow(self):
+        self.client.force_authenticate(user=self.user2)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        single_comment_queries = count_queries()
+        for user in (self.user1, self.admin):
+            Comment.objects.create(user=user, post=self.post, text="Reply")
+
+        self.assertEqual(count_queries(), single_comment_queries)
+
+    def test_list_comments_since(self):
+        self.client.force_authenticate(user=self.user2)
+        reply = Comment.objects.create(
+            user=self.user1, post=self.post, text="Reply"
+        )
+
+        response = self.client.get(
+            self.url, {"since": self.comment.created_at.isoformat()}
+        )
+        self.assertEqual(
+            [comment["id"] for comment in response.data["results"]],
+            [reply.id],
+        )
+
+        response = self.client.get(self.url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_comment_authenticated(self):
         self.client.force_authenticate(user=self.user2)
         data = {"text": self.test_new_comment}
         response = self.client.post(self.url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_comment_count_follows_create_and_delete(self):
+        self.client.force_authenticate(user=self.user2)
+        self.client.post(self.url, {"text": self.test_new_comment})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        self.client.delete(self.detail_url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
     def test_create_comment_unauthenticated(self):
         data = {"text": self.test_new_comment}
         response = self.client.post(self.url, data)
@@ -0,0 +1,130 @@
+"""
+Downscaled WebP copies of post content images and profile pictures.
+
+A thumbnail is stored under a name derived from its source file and the
+configured size, so posts sharing a content-addressed file share its
+thumbnail too, and changing a size makes every thumbnail stale. The
+thumbnail field of a row is set once its file exists, which tells
+serializers whether there is one without touching the storage.
+"""
+
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from social_network.cache import LISTS, post_scope, response_cache, user_scope
+from social_network.models import Post
+from user.cache import user_cache
+from user.models import User
+
+# kind: (model, source field, thumbnail field)
+KINDS = {
+    "post": (Post, "content", "thumbnail"),
+    "picture": (User, "picture", "picture_thumbnail"),
+}
+DEFAULT_SIZES = {"post": (640, 640), "picture": (160, 160)}
+
+
+def get_size(kind):
+    sizes = getattr(settings, "THUMBNAIL_SIZES", DEFAULT_SIZES)
+    return tuple(sizes.get(kind, DEFAULT_SIZES[kind]))
+
+
+def is_image(name):
+    extension = os.path.splitext(name)[1].lower()
+    return extension in Image.registered_extensions()
+
+
+def thumbnail_name(kind, source_name):
+    """Name of the thumbnail of `source_name`, empty for non images."""
+    if not source_name or not is_image(source_name):
+        return ""
+    width, height = get_size(kind)
+    stem = os.path.splitext(source_name)[0]
+    return f"thumbnails/{width}x{height}/{stem}.webp"
+
+
+def is_stale(kind, instance):
+    """Tells whether the thumbnail of `instance` is not its source's."""
+    _, source_field, thumbnail_field = KINDS[kind]
+    expected = thumbnail_name(kind, getattr(instance, source_field).name)
+    return (getattr(instance, thumbnail_field).name or "") != expected
+
+
+def render(source, size):
+    """Returns `source` downscaled to fit `size` as WebP, None if broken."""
+    try:
+        with source.open("rb"), Image.open(source) as image:
+            # lets JPEG decode straight at a fraction of the full size
+            image.draft("RGB", size)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "RGBA"):
+                has_alpha = "A" in image.getbands() or (
+                    "transparency" in image.info
+                )
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            output = BytesIO()
+            image.save(
+                output,
+                "WEBP",
+                quality=getattr(settings, "THUMBNAIL_QUALITY", 80),
+            )
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return None
+    return ContentFile(output.getvalue())
+
+
+def generate(kind, ids):
+    """
+    Brings the thumbnails of the `kind` rows with `ids` in line with their
+    sources, rendering missing files. Returns the number of rows updated.
+    """
+    model, source_field, thumbnail_field = KINDS[kind]
+    storage = model._meta.get_field(thumbnail_field).storage
+    updated = []
+    for instance in model.objects.filter(pk__in=ids).only(
+        "pk", source_field, thumbnail_field
+    ):
+        source = getattr(instance, source_field)
+        name = thumbnail_name(kind, source.name)
+        if name and not storage.exists(name):
+            thumbnail = render(source, get_size(kind))
+            if thumbnail is None:
+                name = ""
+            else:
+                saved = storage.save(name, thumbnail)
+                if saved != name:
+                    # rendered concurrently by another worker
+                    storage.delete(saved)
+        if (getattr(instance, thumbnail_field).name or "") == name:
+            continue
+        # the source may have been replaced in the meantime
+        if model.objects.filter(
+            pk=instance.pk, **{source_field: source.name}
+        ).update(**{thumbnail_field: name}):
+            updated.append(instance.pk)
+    if updated:
+        invalidate(kind, updated)
+    return len(updated)
+
+
+def invalidate(kind, ids):
+    if kind == "post":
+        response_cache.invalidate(LISTS, *map(post_scope, ids))
+    else:
+        user_cache.invalidate(*ids)
+        response_cache.invalidate(*map(user_scope, ids))
+
+
+def candidates(kind):
+    """Rows of `kind` that may have a stale thumbnail, loaded for checks."""
+    model, source_field, thumbnail_field = KINDS[kind]
+    # rows with neither a source nor a thumbnail are up to date
+    return model.objects.only("pk", source_field, thumbnail_field).filter(
+        Q(**{f"{source_field}__gt": ""}) | Q(**{f"{thumbnail_field}__gt": ""})
+    )
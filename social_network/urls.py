@@ -1,16 +1,31 @@
 from django.urls import path, include
 from rest_framework import routers
 
-from social_network.views import PostViewSet, CommentViewSet
+from social_network.views import (
+    BulkLikeView,
+    PostViewSet,
+    CommentViewSet,
+    FeedView,
+    HashtagPostListView,
+)
 
 router = routers.DefaultRouter()
 router.register("posts", PostViewSet, basename="post")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("feed/", FeedView.as_view(), name="feed"),
+    path("likes/", BulkLikeView.as_view(), name="bulk-like"),
+    path(
+        "tags/<str:name>/posts/",
+        HashtagPostListView.as_view(),
+        name="tag-posts",
+    ),
     path(
         "posts/<int:pk>/like/",
-        PostViewSet.as_view({"post": "like"}),
+        PostViewSet.as_view(
+            {"post": "like", "put": "put_like", "delete": "delete_like"}
+        ),
         name="post-like",
     ),
     path(
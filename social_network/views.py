@@ -1,68 +1,122 @@
-from datetime import datetime
+from itertools import islice
 
-from django.db.models import Q, Count
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from django.utils.timezone import make_aware
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from rest_framework import generics, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from social_network.models import Post, Comment, Like
+from social_network import analytics, feed, likes, media
+from social_network.cache import (
+    AnonymousResponseCacheMixin,
+    COUNTERS,
+    LISTS,
+    comments_scope,
+    post_counters_scope,
+    post_scope,
+)
+from social_network.conditional import ConditionalGetMixin
+from social_network.hashtags import normalize_hashtag
+from social_network.search import icontains_filter, post_search_index
+from social_network.models import (
+    Post,
+    Comment,
+    LikeRollup,
+    ScheduledPost,
+)
+from social_network.pagination import (
+    CommentCursorPagination,
+    FeedCursorPagination,
+    PostCursorPagination,
+)
 from social_network.permissions import (
     IsOwnerOrAdminOrReadOnly,
     IsCommentOwnerOrPostOwnerOrAdminOrGetMethod,
 )
 from social_network.serializers import (
+    BulkLikeSerializer,
     PostSerializer,
     CommentSerializer,
     RestrictedPostSerializer,
 )
-from tasks.post_creation_task import create_post
+from user.authentication import CachedJWTAuthentication
+from user.models import User
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    ConditionalGetMixin, AnonymousResponseCacheMixin, viewsets.ModelViewSet
+):
     """
     Gives an opportunity to maintain Post functionality depending on the request.
     Using content fild you able to attach some file.
     """
 
     serializer_class = PostSerializer
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsOwnerOrAdminOrReadOnly,)
+    pagination_class = PostCursorPagination
 
     def get_serializer_class(self):
         if self.request.user.is_authenticated:
             return PostSerializer
         return RestrictedPostSerializer
 
+    def get_version_scopes(self):
+        if self.action == "retrieve":
+            return [
+                post_scope(self.kwargs["pk"]),
+                post_counters_scope(self.kwargs["pk"]),
+            ]
+        return [LISTS, COUNTERS]
+
+    @staticmethod
+    def store_content(validated_data):
+        """Swaps an uploaded `content` for its content-addressed file."""
+        content = validated_data.get("content")
+        if content:
+            validated_data["content"] = media.store(content)
+
     def perform_create(self, serializer):
-        scheduled_time = self.request.data.get("scheduled_time")
-        if scheduled_time:
-            try:
-                scheduled_datetime = datetime.fromisoformat(scheduled_time)
-                if scheduled_datetime <= datetime.now():
-                    raise ValidationError("Scheduled time must be in the future.")
-            except (TypeError, ValueError):
-                raise ValidationError("Invalid scheduled time format.")
-
-            scheduled_datetime = make_aware(scheduled_datetime)
-            post_data = serializer.validated_data
-            create_post.apply_async(
-                args=[
-                    self.request.user.id,
-                    post_data["title"],
-                    post_data["text"],
-                ],
-                kwargs={"content_path": self.request.FILES.get("content")},
-                eta=scheduled_datetime,
-            )
+        scheduled_time = serializer.validated_data.pop("scheduled_time", None)
+        if scheduled_time is not None:
+            if scheduled_time <= timezone.now():
+                raise ValidationError("Scheduled time must be in the future.")
+            with transaction.atomic():
+                self.store_content(serializer.validated_data)
+                # a row survives restarts, unlike a broker message with an ETA
+                ScheduledPost.objects.create(
+                    owner=self.request.user,
+                    publish_at=scheduled_time,
+                    **serializer.validated_data,
+                )
         else:
-            serializer.save(owner=self.request.user)
+            with transaction.atomic():
+                self.store_content(serializer.validated_data)
+                post = serializer.save(owner=self.request.user)
+                User.objects.shift_counter(
+                    [self.request.user.id], "posts_count"
+                )
+                feed.fan_out([post])
+
+    def perform_update(self, serializer):
+        old_content = serializer.instance.content.name
+        with transaction.atomic():
+            self.store_content(serializer.validated_data)
+            serializer.save()
+            if "content" in serializer.validated_data:
+                # replaced or cleared, re-uploading the same bytes nets out
+                media.release(old_content)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            User.objects.shift_counter([instance.owner_id], "posts_count", -1)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -70,57 +124,222 @@ class PostViewSet(viewsets.ModelViewSet):
         self.perform_create(serializer)
         return Response(status=status.HTTP_201_CREATED)
 
+    def get_post_owner_id(self):
+        """Owner of the post in the URL, without loading the post."""
+        return get_object_or_404(
+            Post.objects.values_list("owner_id", flat=True),
+            pk=self.kwargs["pk"],
+        )
+
     @action(detail=True, methods=["post"], permission_classes=(IsAuthenticated,))
     def like(self, request, pk=None):
         """
         Sending POST request you can put a like for post
+        or take it back if you liked the post already
         """
-        post = self.get_object()
-        user = request.user
+        owner_id = self.get_post_owner_id()
+        liked = likes.toggle(request.user, int(pk), owner_id)
+        return Response({"liked": liked}, status=status.HTTP_200_OK)
 
-        if post.likes.filter(id=user.id).exists():
-            post.likes.remove(user)
-            liked = False
-        else:
-            post.likes.add(user)
-            liked = True
+    @like.mapping.put
+    def put_like(self, request, pk=None):
+        """Likes the post, repeating the request changes nothing"""
+        owner_id = self.get_post_owner_id()
+        likes.like(request.user, int(pk), owner_id)
+        return Response({"liked": True}, status=status.HTTP_200_OK)
 
-        return Response({"liked": liked}, status=status.HTTP_200_OK)
+    @like.mapping.delete
+    def delete_like(self, request, pk=None):
+        """Takes the like back, repeating the request changes nothing"""
+        owner_id = self.get_post_owner_id()
+        likes.unlike(request.user, int(pk), owner_id)
+        return Response({"liked": False}, status=status.HTTP_200_OK)
+
+    def get_like_analytics_range(self):
+        """Returns `[start, end)` asked for, either bound may be None."""
+        date_from = self.request.query_params.get("date_from")
+        date_to = self.request.query_params.get("date_to")
+        date = self.request.query_params.get("date")
+
+        try:
+            if date_from or date_to:
+                start = (
+                    analytics.parse_moment(date_from) if date_from else None
+                )
+                end = (
+                    analytics.parse_moment(date_to, end=True)
+                    if date_to
+                    else None
+                )
+            elif date:
+                start = analytics.day_start(analytics.parse_moment(date))
+                end = analytics.next_day(start)
+            else:
+                start = end = None
+        except ValueError:
+            raise ValidationError("Dates have to be in ISO 8601 format.")
+        return start, end
 
+    def get_like_analytics_scope(self):
+        """Returns the rollup scope and key selected by ?post= or ?owner=."""
+        post_id = self.request.query_params.get("post")
+        owner_id = self.request.query_params.get("owner")
+        if post_id and owner_id:
+            raise ValidationError("Filter by either post or owner.")
+        try:
+            if post_id:
+                return LikeRollup.POST, int(post_id)
+            if owner_id:
+                return LikeRollup.OWNER, int(owner_id)
+        except ValueError:
+            raise ValidationError("Post and owner have to be ids.")
+        return LikeRollup.ALL, 0
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="interval",
+                description=(
+                    "Returns a series of like counts per hour, day or week "
+                    "of the server time zone instead of a single total. "
+                    "The range is widened to whole buckets "
+                    "(ex. ?interval=day)"
+                ),
+                required=False,
+                type=str,
+                enum=list(analytics.INTERVALS),
+            ),
+            OpenApiParameter(
+                name="post",
+                description="Counts likes of a single post (ex. ?post=5)",
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="owner",
+                description=(
+                    "Counts likes of posts of a single user (ex. ?owner=3)"
+                ),
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                description=(
+                    "Counts likes given since this date or datetime "
+                    "(ex. ?date_from=2023-06-01)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                description=(
+                    "Counts likes given until this date (inclusive) "
+                    "or datetime (ex. ?date_to=2023-06-30)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="date",
+                description=(
+                    "Counts likes given on a single day, used when neither "
+                    "date_from nor date_to is given (ex. ?date=2023-06-01)"
+                ),
+                required=False,
+                type=str,
+            ),
+        ]
+    )
     @action(detail=False, methods=["get"])
     def like_analytics(self, request):
-        date_from = request.query_params.get("date_from")
-        date_to = request.query_params.get("date_to")
-        date = request.query_params.get("date")
-
-        queryset = Like.objects.filter(post__in=self.get_queryset())
-
-        if date_from and date_to:
-            start_datetime = timezone.make_aware(datetime.fromisoformat(date_from))
-            end_datetime = timezone.make_aware(datetime.fromisoformat(date_to))
-            queryset = queryset.filter(created_at__range=[start_datetime, end_datetime])
-        elif date_from and not date_to:
-            start_datetime = timezone.make_aware(datetime.fromisoformat(date_from))
-            queryset = queryset.filter(created_at__date__gte=start_datetime)
-        elif date_to and not date_from:
-            end_datetime = timezone.make_aware(datetime.fromisoformat(date_to))
-            queryset = queryset.filter(created_at__date__lte=end_datetime)
-        elif date:
-            selected_date = timezone.make_aware(datetime.fromisoformat(date))
-            queryset = queryset.filter(created_at__date=selected_date)
-
-        like_count = queryset.aggregate(total_likes=Count("id"))["total_likes"]
-
-        return Response({"total_likes": like_count})
+        start, end = self.get_like_analytics_range()
+        scope, key = self.get_like_analytics_scope()
+
+        searched_likes = None
+        if "search" in request.query_params or "tag" in request.query_params:
+            # rollups only cover fixed sets of posts
+            searched_likes = analytics.raw_likes(scope, key).filter(
+                post__in=self.get_queryset()
+            )
+
+        interval = request.query_params.get("interval")
+        if not interval:
+            return Response(
+                {
+                    "total_likes": analytics.count_likes(
+                        start, end, scope, key, searched_likes
+                    )
+                }
+            )
+        if interval not in analytics.INTERVALS:
+            raise ValidationError(
+                f"Interval has to be one of: {', '.join(analytics.INTERVALS)}."
+            )
+
+        if start is None:
+            start = analytics.first_like(scope, key, searched_likes)
+        if end is None:
+            end = timezone.now()
+        buckets = []
+        if start is not None:
+            max_buckets = getattr(settings, "LIKE_ANALYTICS_MAX_BUCKETS", 1000)
+            buckets = list(
+                islice(
+                    analytics.bucket_starts(start, end, interval),
+                    max_buckets + 1,
+                )
+            )
+            if len(buckets) > max_buckets:
+                raise ValidationError(
+                    f"The range spans more than {max_buckets} buckets, "
+                    f"narrow it down or pick a longer interval."
+                )
+
+        series = analytics.like_series(
+            buckets, interval, scope, key, searched_likes
+        )
+        return Response(
+            {
+                "total_likes": sum(count for _, count in series),
+                "interval": interval,
+                "series": [
+                    {"start": bucket, "likes": count}
+                    for bucket, count in series
+                ],
+            }
+        )
 
     def get_queryset(self):
-        queryset = Post.objects.prefetch_related("owner")
+        queryset = self.get_serializer_class().prepare_queryset(
+            Post.objects.all(), self.request
+        )
 
         search_param = self.request.query_params.get("search")
+        tag_param = self.request.query_params.get("tag")
 
         if search_param:
+            # ranking only matters to lists, other actions may nest the
+            # queryset in a subquery
+            ranked = self.action == "list"
+            search = (
+                post_search_index.ranked_search
+                if ranked
+                else post_search_index.search
+            )
+            searched = search(queryset, (search_param, None))
+            if searched is None:
+                queryset = queryset.filter(
+                    icontains_filter(("title", "text"), search_param)
+                )
+            else:
+                queryset = searched
+                if ranked:
+                    self.ranked_ordering = ("search_rank", "id")
+        if tag_param:
             queryset = queryset.filter(
-                Q(title__icontains=search_param) | Q(text__icontains=search_param)
+                hashtags__name=normalize_hashtag(tag_param)
             )
         return queryset
 
@@ -131,33 +350,205 @@ class PostViewSet(viewsets.ModelViewSet):
                 description=(
                     "Search parameter. Gives an opportunity "
                     "to search by post's title or text. "
-                    "Letter case doesn't matter. This will return all "
-                    "entities of given param in titles and texts. "
+                    "Letter case doesn't matter. Every word matches "
+                    "as a prefix and the best matches come first. "
                     "(ex. ?search=OREO)"
                 ),
                 required=False,
                 type=str,
-            )
+            ),
+            OpenApiParameter(
+                name="tag",
+                description=(
+                    "Hashtag filter. Returns posts mentioning the hashtag "
+                    "in their title or text, with or without `#` "
+                    "(ex. ?tag=books)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Number of posts per page (max 100).",
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="fields",
+                description=(
+                    "Comma separated fields to return, the rest are "
+                    "neither computed nor queried (ex. ?fields=id,title)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="omit",
+                description=(
+                    "Comma separated fields to leave out "
+                    "(ex. ?omit=owner,liked_by_current_user)"
+                ),
+                required=False,
+                type=str,
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(self, request, *args, **kwargs)
+        return super().list(request, *args, **kwargs)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Gives an opportunity to maintain Comment functionality depending on the request.
     """
 
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsCommentOwnerOrPostOwnerOrAdminOrGetMethod,)
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+
+    def get_version_scopes(self):
+        return [comments_scope(self.kwargs["post_pk"])]
 
     def get_queryset(self):
         post_id = self.kwargs.get("post_pk")
-        return Comment.objects.filter(post_id=post_id)
+        queryset = Comment.objects.filter(post_id=post_id).select_related(
+            "user"
+        )
+
+        since_param = self.request.query_params.get("since")
+        if since_param and self.action == "list":
+            try:
+                since = analytics.parse_moment(since_param)
+            except ValueError:
+                raise ValidationError("Dates have to be in ISO 8601 format.")
+            queryset = queryset.filter(created_at__gt=since)
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description=(
+                    "Returns only comments written after this date "
+                    "or datetime, pass `created_at` of the newest comment "
+                    "you have to poll for new ones "
+                    "(ex. ?since=2023-06-01T12:30:00.123456Z)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Number of comments per page (max 100).",
+                required=False,
+                type=int,
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         post_id = self.kwargs.get("post_pk")
         post = get_object_or_404(Post, pk=post_id)
-        serializer.save(user=self.request.user, post=post)
+        with transaction.atomic():
+            serializer.save(user=self.request.user, post=post)
+            Post.objects.filter(pk=post.pk).update(
+                comment_count=F("comment_count") + 1
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(
+                pk=instance.post_id, comment_count__gt=0
+            ).update(comment_count=F("comment_count") - 1)
+
+
+class FeedView(generics.ListAPIView):
+    """
+    Home feed with posts of the users you follow, newest first.
+    """
+
+    serializer_class = PostSerializer
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        return PostSerializer.prepare_queryset(
+            Post.objects.all(), self.request
+        )
+
+
+class BulkLikeView(generics.GenericAPIView):
+    """
+    Likes and unlikes many posts at once, the result is reported per post.
+    Liking a liked post or unliking a post you don't like changes nothing.
+    """
+
+    serializer_class = BulkLikeSerializer
+    authentication_classes = (CachedJWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_like = serializer.validated_data["like"]
+        to_unlike = serializer.validated_data["unlike"]
+
+        owner_ids = dict(
+            Post.objects.filter(pk__in=[*to_like, *to_unlike]).values_list(
+                "pk", "owner_id"
+            )
+        )
+        with transaction.atomic():
+            liked = likes.like_many(
+                request.user,
+                {pk: owner_ids[pk] for pk in to_like if pk in owner_ids},
+            )
+            unliked = likes.unlike_many(
+                request.user,
+                {pk: owner_ids[pk] for pk in to_unlike if pk in owner_ids},
+            )
+
+        results = []
+        for ids, now_liked, changed in (
+            (to_like, True, liked),
+            (to_unlike, False, unliked),
+        ):
+            for pk in ids:
+                if pk not in owner_ids:
+                    results.append({"post": pk, "error": "Not found."})
+                else:
+                    results.append(
+                        {
+                            "post": pk,
+                            "liked": now_liked,
+                            "changed": pk in changed,
+                        }
+                    )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class HashtagPostListView(AnonymousResponseCacheMixin, generics.ListAPIView):
+    """
+    Posts mentioning the given hashtag, newest first.
+    """
+
+    authentication_classes = (CachedJWTAuthentication,)
+    pagination_class = PostCursorPagination
+
+    def get_serializer_class(self):
+        if self.request.user.is_authenticated:
+            return PostSerializer
+        return RestrictedPostSerializer
+
+    def get_queryset(self):
+        return self.get_serializer_class().prepare_queryset(
+            Post.objects.filter(
+                hashtags__name=normalize_hashtag(self.kwargs["name"])
+            ),
+            self.request,
+        )
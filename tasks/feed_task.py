@@ -0,0 +1,23 @@
+from celery import shared_task
+from django.db import transaction
+
+from social_network import feed
+
+
+@shared_task
+def fan_out_latest_posts(owner_ids):
+    """Copies latest posts of `owner_ids` to followers, see `feed`."""
+    feed.fan_out_latest(owner_ids)
+
+
+def schedule_fan_out(owner_ids):
+    """
+    Queues owners out of `owner_ids` that an unfollow moved below
+    the fan-out limit, after the commit.
+    """
+    ids = feed.dropped_below_limit(owner_ids)
+    if ids:
+        # an unreachable broker is logged, it must not fail the unfollow
+        transaction.on_commit(
+            lambda: fan_out_latest_posts.delay(ids), robust=True
+        )
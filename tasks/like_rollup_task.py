@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils.timezone import now
+
+from social_network import analytics
+
+
+@shared_task
+def rebuild_like_rollups():
+    """Recomputes like rollups of the latest days from the likes table."""
+    days = getattr(settings, "LIKE_ROLLUP_REBUILD_DAYS", 2)
+    analytics.rebuild(start=now() - timedelta(days=days - 1))
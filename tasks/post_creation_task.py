@@ -1,18 +1,70 @@
-from pathlib import Path
+from collections import Counter, defaultdict
 
 from celery import shared_task
+from django.db import transaction
 
+from social_network import feed
+from social_network.cache import LISTS, response_cache
+from social_network.hashtags import index_posts
 from social_network.models import Post
+from tasks.thumbnail_task import schedule_thumbnails
 from user.models import User
 
 
+def publish_posts(posts):
+    """
+    Inserts unsaved `posts` with one query and does what creating a post
+    implies once for the whole batch. Call it in a transaction.
+    """
+    posts = Post.objects.bulk_create(posts)
+    owners_by_count = defaultdict(list)
+    for owner_id, count in Counter(post.owner_id for post in posts).items():
+        owners_by_count[count].append(owner_id)
+    for count, owner_ids in owners_by_count.items():
+        User.objects.shift_counter(owner_ids, "posts_count", count)
+    # bulk_create skips the post_save signals
+    index_posts(posts)
+    response_cache.invalidate(LISTS)
+    schedule_thumbnails("post", posts)
+    feed.fan_out(posts)
+    return posts
+
+
+@shared_task
+def create_posts(items):
+    """
+    Publishes `items`, dicts of `owner_id`, `title`, `text` and an
+    optional `content_path`, in one transaction. Items of owners that
+    don't exist anymore are skipped. Returns ids of the new posts.
+    """
+    owners = User.objects.only("id").in_bulk(
+        {item["owner_id"] for item in items}
+    )
+    with transaction.atomic():
+        posts = publish_posts(
+            [
+                Post(
+                    owner=owners[item["owner_id"]],
+                    title=item["title"],
+                    text=item["text"],
+                    content=item.get("content_path") or None,
+                )
+                for item in items
+                if item["owner_id"] in owners
+            ]
+        )
+    return [post.pk for post in posts]
+
+
 @shared_task
 def create_post(owner_id, title, text, content_path=None):
-    owner = User.objects.get(id=owner_id)
-    content = Path(content_path) if content_path else None
-    Post.objects.create(
-        owner=owner,
-        title=title,
-        text=text,
-        content=content,
+    return create_posts(
+        [
+            {
+                "owner_id": owner_id,
+                "title": title,
+                "text": text,
+                "content_path": content_path,
+            }
+        ]
     )
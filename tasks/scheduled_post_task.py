@@ -0,0 +1,41 @@
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from social_network.models import Post, ScheduledPost
+from tasks.post_creation_task import publish_posts
+
+
+@shared_task
+def publish_scheduled_posts():
+    """Publishes scheduled posts that are due, a batch per transaction."""
+    batch_size = getattr(settings, "SCHEDULED_POST_BATCH_SIZE", 1000)
+    due = ScheduledPost.objects.filter(publish_at__lte=now()).order_by(
+        "publish_at", "id"
+    )
+    published = 0
+    while True:
+        with transaction.atomic():
+            # concurrent runs skip each other's batches where supported
+            batch = list(due.select_for_update(skip_locked=True)[:batch_size])
+            if not batch:
+                return published
+            publish_posts(
+                [
+                    Post(
+                        owner_id=scheduled.owner_id,
+                        title=scheduled.title,
+                        text=scheduled.text,
+                        content=scheduled.content.name or None,
+                    )
+                    for scheduled in batch
+                ]
+            )
+            published_rows = ScheduledPost.objects.filter(
+                pk__in=[scheduled.pk for scheduled in batch]
+            )
+            # the posts take the references to the content files over
+            published_rows.update(content=None)
+            published_rows.delete()
+        published += len(batch)
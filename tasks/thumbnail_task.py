@@ -0,0 +1,24 @@
+from celery import shared_task
+from django.db import transaction
+
+from social_network import thumbnails
+
+
+@shared_task
+def create_thumbnails(kind, ids):
+    """Renders thumbnails of the `kind` rows with `ids`, see `thumbnails`."""
+    return thumbnails.generate(kind, ids)
+
+
+def schedule_thumbnails(kind, instances):
+    """Queues rows of `instances` with stale thumbnails after the commit."""
+    ids = [
+        instance.pk
+        for instance in instances
+        if thumbnails.is_stale(kind, instance)
+    ]
+    if ids:
+        # an unreachable broker is logged, it must not fail the upload
+        transaction.on_commit(
+            lambda: create_thumbnails.delay(kind, ids), robust=True
+        )
@@ -0,0 +1,64 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+from django.db import transaction
+
+
+class UserCache:
+    """
+    Bounded LRU cache of user objects with a time to live.
+    Entries are dropped explicitly when a user changes, the TTL only bounds
+    how long other processes may keep serving a stale copy.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (user, monotonic() + self.ttl)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def drop(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._users.pop(user_id, None)
+
+    def invalidate(self, *user_ids):
+        """
+        Drops `user_ids` now and once the current transaction commits,
+        as requests running in between may cache the old rows again.
+        """
+        if not user_ids:
+            return
+        self.drop(*user_ids)
+        transaction.on_commit(lambda: self.drop(*user_ids))
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, "AUTH_USER_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "AUTH_USER_CACHE_TTL", 60),
+)
@@ -0,0 +1,95 @@
+"""
+Following and unfollowing users together with their side effects:
+the followers and following counters and the home feed.
+Every function runs a fixed number of queries however many users it gets.
+"""
+
+from django.db import transaction
+from django.db.models import Q
+
+from social_network import feed
+from tasks.feed_task import schedule_fan_out
+from user.models import User
+
+Follow = User.following.through
+
+
+def follow_many(user, followees):
+    """
+    Follows every user of `followees` not followed by `user` yet.
+    Returns ids of the newly followed users.
+    """
+    with transaction.atomic():
+        followed = set(
+            Follow.objects.filter(
+                from_user_id=user.id,
+                to_user_id__in=[followee.id for followee in followees],
+            ).values_list("to_user_id", flat=True)
+        )
+        new_followees = [
+            followee for followee in followees if followee.id not in followed
+        ]
+        if new_followees:
+            Follow.objects.bulk_create(
+                [
+                    Follow(from_user_id=user.id, to_user_id=followee.id)
+                    for followee in new_followees
+                ],
+                ignore_conflicts=True,
+            )
+            User.objects.shift_counter(
+                [user.id], "following_count", len(new_followees)
+            )
+            User.objects.shift_counter(
+                [followee.id for followee in new_followees], "followers_count"
+            )
+            feed.backfill(user.id, *new_followees)
+    return {followee.id for followee in new_followees}
+
+
+def unfollow_many(user, followee_ids):
+    """
+    Unfollows every followed user of `followee_ids`.
+    Returns ids of the users that were followed.
+    """
+    with transaction.atomic():
+        followed = list(
+            Follow.objects.filter(
+                from_user_id=user.id, to_user_id__in=followee_ids
+            ).values_list("to_user_id", flat=True)
+        )
+        if followed:
+            Follow.objects.filter(
+                from_user_id=user.id, to_user_id__in=followed
+            ).delete()
+            User.objects.shift_counter(
+                [user.id], "following_count", -len(followed)
+            )
+            User.objects.shift_counter(followed, "followers_count", -1)
+            feed.remove(user.id, *followed)
+            schedule_fan_out(followed)
+    return set(followed)
+
+
+def unfollow_all(user):
+    """
+    Drops every follow from and to `user`, e.g. before the user is deleted,
+    moving the counters of the users on the other side.
+    """
+    with transaction.atomic():
+        follows = Follow.objects.filter(
+            Q(from_user_id=user.id) | Q(to_user_id=user.id)
+        )
+        followee_ids, follower_ids = [], []
+        for from_user_id, to_user_id in follows.values_list(
+            "from_user_id", "to_user_id"
+        ):
+            if from_user_id == user.id:
+                followee_ids.append(to_user_id)
+            else:
+                follower_ids.append(from_user_id)
+        if followee_ids or follower_ids:
+            follows.delete()
+            User.objects.shift_counter(followee_ids, "followers_count", -1)
+            User.objects.shift_counter(follower_ids, "following_count", -1)
+            schedule_fan_out(followee_ids)
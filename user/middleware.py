@@ -1,31 +1,89 @@
-import jwt
+import threading
+from datetime import timedelta
+from time import monotonic
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.utils.timezone import make_aware, make_naive, now
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+from django.utils.timezone import now
+
+
+class LastRequestBuffer:
+    """
+    Coalesces `last_request` writes.
+    Every user is recorded at most once per `granularity` and pending
+    timestamps are written with a single bulk UPDATE once `flush_interval`
+    seconds have passed since the previous flush. The write is postponed
+    while a transaction is open, so it never rides along someone else's
+    transaction.
+    """
+
+    def __init__(self, flush_interval=60, granularity=60):
+        self.flush_interval = flush_interval
+        self.granularity = timedelta(seconds=granularity)
+        self._pending = {}
+        self._recorded = {}
+        self._last_flush = monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, user_id, timestamp):
+        with self._lock:
+            recorded = self._recorded.get(user_id)
+            if recorded is None or timestamp - recorded >= self.granularity:
+                self._recorded[user_id] = timestamp
+                self._pending[user_id] = timestamp
+            flush_due = monotonic() - self._last_flush >= self.flush_interval
+        if flush_due and not connection.in_atomic_block:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = monotonic()
+            expired = now() - self.granularity
+            self._recorded = {
+                user_id: timestamp
+                for user_id, timestamp in self._recorded.items()
+                if timestamp > expired
+            }
+        if not pending:
+            return
+        user_model = get_user_model()
+        user_model.objects.bulk_update(
+            [
+                user_model(pk=user_id, last_request=timestamp)
+                for user_id, timestamp in pending.items()
+            ],
+            ["last_request"],
+            batch_size=500,
+        )
+
+
+last_request_buffer = LastRequestBuffer(
+    flush_interval=getattr(settings, "LAST_REQUEST_FLUSH_INTERVAL", 60),
+    granularity=getattr(settings, "LAST_REQUEST_GRANULARITY", 60),
+)
 
 
 class UpdateLastRequestMiddleware:
+    """
+    Records the request time of users authenticated by the view.
+    The token is decoded only once, by the view's authentication class,
+    which stores the resolved user on the request.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        user = None
-        token = request.META.get("HTTP_AUTHORIZATION")
-
-        if token:
-            token = token.split()[-1]
-            try:
-                decoded_payload = jwt.decode(
-                    token, settings.SECRET_KEY, algorithms=["HS256"]
-                )
-                user_id = decoded_payload.get("user_id")
-                user = get_user_model().objects.get(pk=user_id)
-                user.last_request = make_aware(make_naive(now()))
-                user.save()
-            except jwt.ExpiredSignatureError:
-                pass
-
-        request.user = user
-
         response = self.get_response(request)
+
+        user = getattr(request, "user", None)
+        # session users stay lazy, only API authentication replaces them
+        if type(user) is SimpleLazyObject or user is None:
+            return response
+        if user.is_authenticated:
+            last_request_buffer.record(user.pk, now())
+
         return response
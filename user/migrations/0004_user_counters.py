@@ -0,0 +1,55 @@
+# Generated by Django 4.2.2 on 2026-10-18 05:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Post = apps.get_model("social_network", "Post")
+    Follow = User.following.through
+    User.objects.update(
+        followers_count=count_subquery(Follow, "to_user_id"),
+        following_count=count_subquery(Follow, "from_user_id"),
+        posts_count=count_subquery(Post, "owner_id"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0003_user_last_request"),
+        ("social_network", "0006_post_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
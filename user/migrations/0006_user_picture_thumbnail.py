@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0005_user_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="picture_thumbnail",
+            field=models.FileField(
+                blank=True, editable=False, null=True, upload_to=""
+            ),
+        ),
+    ]
@@ -3,8 +3,12 @@ from django.contrib.auth.models import (
     BaseUserManager,
 )
 from django.db import models
+from django.db.models import F
 from django.utils.translation import gettext as _
 
+from social_network.cache import response_cache, user_scope
+from user.cache import user_cache
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -34,6 +38,19 @@ class UserManager(BaseUserManager):
 
         return self._create_user(email, password, **extra_fields)
 
+    def shift_counter(self, user_ids, counter, delta=1):
+        """
+        Atomically moves a denormalized counter of the given users by `delta`,
+        never letting it drop below zero.
+        """
+        queryset = self.filter(pk__in=user_ids)
+        if delta < 0:
+            queryset = queryset.filter(**{f"{counter}__gte": -delta})
+        updated = queryset.update(**{counter: F(counter) + delta})
+        user_cache.invalidate(*user_ids)
+        response_cache.invalidate(*(user_scope(pk) for pk in user_ids))
+        return updated
+
 
 class User(AbstractUser):
     email = models.EmailField(_("email address"), unique=True)
@@ -49,15 +66,29 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    # set by the thumbnail task once the file exists
+    picture_thumbnail = models.FileField(blank=True, null=True, editable=False)
     following = models.ManyToManyField(
         "self", symmetrical=False, related_name="followers"
     )
     last_request = models.DateTimeField(null=True, blank=True)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # lets saves tell renames apart, see invalidate_cached_author
+        instance._saved_username = dict(zip(field_names, values)).get(
+            "username"
+        )
+        return instance
+
     def __str__(self):
         return self.username
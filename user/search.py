@@ -0,0 +1,5 @@
+from social_network.search import FullTextIndex
+
+user_search_index = FullTextIndex(
+    "user_user", ("username", "first_name", "last_name", "email")
+)
@@ -1,14 +1,19 @@
-from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 
+from social_network.serializers import (
+    BulkActionSerializer,
+    SparseFieldsMixin,
+    id_list_field,
+    selected_fields,
+)
 from user.models import User
 
 
-class BaseUserSerializer(serializers.ModelSerializer):
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
-    posts_count = serializers.SerializerMethodField()
+class BaseUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+    posts_count = serializers.IntegerField(read_only=True)
     followers = serializers.HyperlinkedIdentityField(
         view_name="user:user-followers",
         lookup_field="id",
@@ -41,6 +46,7 @@ class BaseUserSerializer(serializers.ModelSerializer):
             "is_staff",
             "bio",
             "picture",
+            "picture_thumbnail",
             "followers_count",
             "following_count",
             "posts_count",
@@ -50,21 +56,9 @@ class BaseUserSerializer(serializers.ModelSerializer):
             "liked_posts",
         )
 
-        read_only_fields = ("is_staff",)
+        read_only_fields = ("is_staff", "picture_thumbnail")
         extra_kwargs = {"password": {"write_only": True, "min_length": 5}}
 
-    @extend_schema_field(serializers.IntegerField)
-    def get_followers_count(self, obj):
-        return obj.followers.count()
-
-    @extend_schema_field(serializers.IntegerField)
-    def get_following_count(self, obj):
-        return obj.following.count()
-
-    @extend_schema_field(serializers.IntegerField)
-    def get_posts_count(self, obj):
-        return obj.posts.count()
-
 
 class UserSelfSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
@@ -88,10 +82,17 @@ class UserListSerializer(BaseUserSerializer):
             "first_name",
             "last_name",
             "picture",
+            "picture_thumbnail",
             "followers_count",
             "following_count",
         )
 
+    @classmethod
+    def prepare_queryset(cls, queryset, request):
+        """Loads only the columns the selected fields need."""
+        # counts come from the counter columns, nothing else is needed
+        return queryset.only("id", *selected_fields(request, cls.Meta.fields))
+
 
 class UserDetailSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
@@ -104,6 +105,7 @@ class UserDetailSerializer(BaseUserSerializer):
             "is_staff",
             "bio",
             "picture",
+            "picture_thumbnail",
             "followers_count",
             "following_count",
             "posts_count",
@@ -124,6 +126,7 @@ class FollowLogicSerializer(
             "first_name",
             "last_name",
             "picture",
+            "picture_thumbnail",
             "posts",
         )
         extra_kwargs = {
@@ -147,3 +150,8 @@ class UserCreateSerializer(BaseUserSerializer):
 
 class CustomAuthTokenSerializer(AuthTokenSerializer):
     username = serializers.EmailField(label="Email")
+
+
+class BulkFollowSerializer(BulkActionSerializer):
+    follow = id_list_field()
+    unfollow = id_list_field()
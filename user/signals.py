@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from social_network.cache import response_cache, user_scope
+from tasks.thumbnail_task import schedule_thumbnails
+from user import follows
+from user.cache import user_cache
+from user.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+    response_cache.invalidate(user_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def schedule_picture_thumbnail(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "picture" not in update_fields:
+        return
+    schedule_thumbnails("picture", [instance])
+
+
+@receiver(pre_delete, sender=User)
+def drop_follows(sender, instance, **kwargs):
+    # the cascade would delete follows without moving the counters
+    follows.unfollow_all(instance)
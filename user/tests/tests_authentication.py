@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.authentication import CachedJWTAuthentication
+from user.cache import UserCache, user_cache
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email="cached@example.com",
+            username="cached",
+            password="password",
+        )
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def authenticate(self):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        user, _ = self.authentication.authenticate(Request(request))
+        return user
+
+    def test_warm_cache_costs_no_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+
+    def test_user_save_invalidates_cache(self):
+        self.authenticate()
+        self.user.first_name = "Changed"
+        self.user.save()
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertEqual(user.first_name, "Changed")
+
+    def test_counter_update_invalidates_cache(self):
+        self.authenticate()
+        get_user_model().objects.shift_counter([self.user.id], "posts_count")
+        self.assertEqual(self.authenticate().posts_count, 1)
+
+    def test_user_recached_before_commit_is_dropped_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Changed"
+            self.user.save()
+            # a concurrent request caches the row the commit is replacing
+            user_cache.set(self.user.id, "stale")
+        self.assertIsNone(user_cache.get(self.user.id))
+
+
+class UserCacheTest(APITestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache(maxsize=2)
+        cache.set(1, "first")
+        cache.set(2, "second")
+        cache.get(1)
+        cache.set(3, "third")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), "first")
+
+    def test_expired_entry_is_dropped(self):
+        cache = UserCache(ttl=0)
+        cache.set(1, "first")
+        self.assertIsNone(cache.get(1))
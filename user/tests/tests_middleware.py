@@ -0,0 +1,70 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user.middleware import LastRequestBuffer
+
+
+class LastRequestBufferTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="buffer@example.com",
+            username="buffer",
+            password="password",
+        )
+        self.buffer = LastRequestBuffer(flush_interval=3600, granularity=60)
+
+    def test_records_are_coalesced_per_granularity(self):
+        first = timezone.now()
+        self.buffer.record(self.user.id, first)
+        self.buffer.record(self.user.id, first + timedelta(seconds=30))
+
+        with self.assertNumQueries(1):
+            self.buffer.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_request, first)
+
+        later = first + timedelta(seconds=90)
+        self.buffer.record(self.user.id, later)
+        self.buffer.flush()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_request, later)
+
+    def test_nothing_is_written_before_flush(self):
+        self.buffer.record(self.user.id, timezone.now())
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_request)
+
+    def test_flush_without_pending_records_skips_database(self):
+        with self.assertNumQueries(0):
+            self.buffer.flush()
+
+
+class UpdateLastRequestMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="middleware@example.com",
+            username="middleware",
+            password="password",
+        )
+        self.buffer = LastRequestBuffer(flush_interval=3600)
+        patcher = mock.patch("user.middleware.last_request_buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_records_user_authenticated_by_token(self):
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            reverse("user:manage"), HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.user.id, self.buffer._pending)
+
+    def test_anonymous_request_is_not_recorded(self):
+        self.client.get(reverse("social_network:post-list"))
+        self.assertEqual(self.buffer._pending, {})
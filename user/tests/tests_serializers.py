@@ -43,6 +43,7 @@ class BaseUserSerializerTest(APITestCase):
             "is_staff": False,
             "bio": None,
             "picture": None,
+            "picture_thumbnail": None,
             "followers_count": 0,
             "following_count": 0,
             "posts_count": 0,
@@ -64,6 +65,7 @@ class BaseUserSerializerTest(APITestCase):
             "first_name": "John",
             "last_name": "Doe",
             "picture": None,
+            "picture_thumbnail": None,
             "followers_count": 0,
             "following_count": 0,
         }
@@ -82,6 +84,7 @@ class BaseUserSerializerTest(APITestCase):
             "is_staff": False,
             "bio": None,
             "picture": None,
+            "picture_thumbnail": None,
             "followers_count": 0,
             "following_count": 0,
             "posts_count": 0,
@@ -101,6 +104,7 @@ class BaseUserSerializerTest(APITestCase):
             "first_name": "John",
             "last_name": "Doe",
             "picture": None,
+            "picture_thumbnail": None,
             "posts": f"http://testserver/api/user/{self.user.id}/posts/",
         }
         self.assertEqual(serializer.data, expected_data)
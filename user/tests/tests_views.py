@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from social_network import likes
 from social_network.models import Post
+from user import follows
 
 TEST_EMAIL = "test@example.com"
 TEST_USERNAME = "testuser"
@@ -63,6 +67,23 @@ class ManageSelfUserViewTest(APITestCase):
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    def test_delete_user_moves_counters(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", username="other", password="password"
+        )
+        follows.follow_many(self.user, [other])
+        follows.follow_many(other, [self.user])
+        post = Post.objects.create(owner=other, title="Liked", text="Text")
+        likes.like(self.user, post.id, other.id)
+
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        other.refresh_from_db()
+        self.assertEqual(other.followers_count, 0)
+        self.assertEqual(other.following_count, 0)
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 0)
+
 
 class UserListViewTest(APITestCase):
     def setUp(self):
@@ -79,13 +100,54 @@ class UserListViewTest(APITestCase):
         url = reverse("user:user-list")
         response = self.client.get(url, {"search": TEST_EMAIL})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_filter_users_by_email_authenticated(self):
         url = reverse("user:user-list")
         response = self.client.get(url, {"email": TEST_EMAIL})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_list_users_with_selected_fields(self):
+        url = reverse("user:user-list")
+        response = self.client.get(url, {"fields": "id,username"})
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.user.id, "username": self.user.username}],
+        )
+
+    def test_list_users_loads_selected_columns_only(self):
+        url = reverse("user:user-list")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, {"omit": "first_name,last_name"})
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        self.assertIn('"user_user"."username"', sql)
+        self.assertNotIn('"user_user"."first_name"', sql)
+
+    def test_list_users_in_pages(self):
+        others = [
+            get_user_model().objects.create_user(
+                email=f"other{index}@example.com",
+                username=f"other{index}",
+                password="password",
+            )
+            for index in range(4)
+        ]
+        for other in others:
+            self.user.following.add(other)
+
+        ids = []
+        url = f"{reverse('user:user-list')}?page_size=2"
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            ids += [user["id"] for user in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(ids, [self.user.id] + [other.id for other in others])
 
 
 class UserDetailViewTest(APITestCase):
@@ -128,6 +190,19 @@ class UserDetailViewTest(APITestCase):
             response.data["detail"], "You are now following this user."
         )
 
+    def test_follow_user_updates_counters(self):
+        self.client.post(self.url)
+        self.user.refresh_from_db()
+        self.user_to_follow.refresh_from_db()
+        self.assertEqual(self.user.following_count, 1)
+        self.assertEqual(self.user_to_follow.followers_count, 1)
+
+        self.client.post(self.url)
+        self.user.refresh_from_db()
+        self.user_to_follow.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        self.assertEqual(self.user_to_follow.followers_count, 0)
+
     def test_follow_user_unauthenticated(self):
         self.client.force_authenticate(user=None)
         url = self.url
@@ -159,6 +234,91 @@ class UserDetailViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class BulkFollowViewTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email=TEST_EMAIL, username=TEST_USERNAME, password=TEST_PASSWORD
+        )
+        self.others = [
+            get_user_model().objects.create_user(
+                email=f"other{index}@example.com",
+                username=f"other{index}",
+                password=TEST_PASSWORD,
+            )
+            for index in range(3)
+        ]
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("user:bulk-follow")
+
+    def test_bulk_follow_and_unfollow(self):
+        first, second, third = self.others
+        self.client.post(reverse("user:user-detail", kwargs={"id": first.id}))
+        Post.objects.create(owner=second, title="Hello", text="Hello")
+        missing = third.id + 1
+
+        response = self.client.post(
+            self.url,
+            {
+                "follow": [first.id, second.id, self.user.id, missing],
+                "unfollow": [third.id],
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"user": first.id, "following": True, "changed": False},
+                {"user": second.id, "following": True, "changed": True},
+                {"user": self.user.id, "error": "You cannot follow yourself."},
+                {"user": missing, "error": "Not found."},
+                {"user": third.id, "following": False, "changed": False},
+            ],
+        )
+        self.user.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(self.user.following_count, 2)
+        self.assertEqual(second.followers_count, 1)
+        self.assertTrue(
+            self.user.feed_entries.filter(post__owner=second).exists()
+        )
+
+        response = self.client.post(
+            self.url, {"unfollow": [first.id, second.id]}, format="json"
+        )
+        self.assertEqual(
+            [item["changed"] for item in response.data["results"]],
+            [True, True],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following_count, 0)
+        self.assertFalse(self.user.following.exists())
+        self.assertFalse(self.user.feed_entries.exists())
+
+    def test_bulk_unfollow_self(self):
+        response = self.client.post(
+            self.url, {"unfollow": [self.user.id]}, format="json"
+        )
+        self.assertEqual(
+            response.data["results"],
+            [{"user": self.user.id, "error": "You cannot unfollow yourself."}],
+        )
+
+    def test_bulk_follow_too_many_users(self):
+        response = self.client.post(
+            self.url, {"follow": list(range(1, 202))}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_follow_unauthenticated(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(
+            self.url, {"follow": [self.others[0].id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class BaseUserPostsTest(APITestCase):
     def setUp(self):
         self.user = self.create_test_user()
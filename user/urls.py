@@ -1,6 +1,7 @@
 from django.urls import path
 
 from user.views import (
+    BulkFollowView,
     CreateUserView,
     ManageSelfUserView,
     UserFollowView,
@@ -16,6 +17,7 @@ urlpatterns = [
     path("register/", CreateUserView.as_view(), name="create"),
     path("me/", ManageSelfUserView.as_view(), name="manage"),
     path("list/", UserListView.as_view(), name="user-list"),
+    path("following/", BulkFollowView.as_view(), name="bulk-follow"),
     path("<int:id>/", UserDetailView.as_view(), name="user-detail"),
     path(
         "<int:id>/followers/",
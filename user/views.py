@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db import transaction
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import generics, status
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -6,12 +6,22 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from social_network.models import Post
+from social_network.pagination import (
+    PostCursorPagination,
+    UserCursorPagination,
+)
+from social_network.cache import user_scope
+from social_network.conditional import ConditionalGetMixin
+from social_network.search import icontains_filter
 from social_network.serializers import PostSerializer
+from user import follows
+from user.authentication import CachedJWTAuthentication
 from user.models import User
+from user.search import user_search_index
 from user.serializers import (
+    BulkFollowSerializer,
     UserSelfSerializer,
     FollowLogicSerializer,
     UserListSerializer,
@@ -22,7 +32,7 @@ from user.serializers import (
 
 
 class AuthenticationPermissionMixin:
-    authentication_classes = (JWTAuthentication,)
+    authentication_classes = (CachedJWTAuthentication,)
     permission_classes = (IsAuthenticated,)
 
 
@@ -45,7 +55,9 @@ class CreateTokenView(ObtainAuthToken):
 
 
 class ManageSelfUserView(
-    AuthenticationPermissionMixin, generics.RetrieveUpdateDestroyAPIView
+    ConditionalGetMixin,
+    AuthenticationPermissionMixin,
+    generics.RetrieveUpdateDestroyAPIView,
 ):
     """
     Endpoint related to managing users self account
@@ -53,8 +65,12 @@ class ManageSelfUserView(
 
     serializer_class = UserSelfSerializer
 
+    def get_version_scopes(self):
+        return [user_scope(self.request.user.pk)]
+
     def get_object(self):
-        return self.request.user
+        # the authenticated user may come from the cache, edit a fresh row
+        return User.objects.get(pk=self.request.user.pk)
 
     def perform_update(self, serializer):
         instance = serializer.save()
@@ -80,23 +96,33 @@ class UserListView(AuthenticationPermissionMixin, generics.ListAPIView):
     """Endpoint for listing users"""
 
     serializer_class = UserListSerializer
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
-        queryset = User.objects.prefetch_related(
-            "liked_posts", "following", "followers"
+        queryset = UserListSerializer.prepare_queryset(
+            User.objects.all(), self.request
         )
 
         search_param = self.request.query_params.get("search")
         email_param = self.request.query_params.get("email")
 
+        matches = []
+        if email_param:
+            matches.append((email_param, ("email",)))
         if search_param:
-            queryset = queryset.filter(
-                Q(username__icontains=search_param)
-                | Q(first_name__icontains=search_param)
-                | Q(last_name__icontains=search_param)
+            matches.append(
+                (search_param, ("username", "first_name", "last_name"))
             )
-        if email_param:
-            queryset = queryset.filter(email__icontains=email_param)
+        if matches:
+            searched = user_search_index.ranked_search(queryset, *matches)
+            if searched is None:
+                for search, columns in matches:
+                    queryset = queryset.filter(
+                        icontains_filter(columns, search)
+                    )
+            else:
+                queryset = searched
+                self.ranked_ordering = ("search_rank", "id")
         return queryset
 
     @extend_schema(
@@ -106,20 +132,48 @@ class UserListView(AuthenticationPermissionMixin, generics.ListAPIView):
                 description=(
                     "Search parameter. Gives an opportunity "
                     "to search by first name, last name, username. "
-                    "Letter case doesn't matter. This will return all "
-                    "entities of given param in first names, last names, "
-                    "and usernames (ex. ?search=petrovich)"
+                    "Letter case doesn't matter. Every word matches "
+                    "as a prefix of first names, last names or usernames, "
+                    "the best matches come first (ex. ?search=petrovich)"
                 ),
                 required=False,
                 type=str,
-            )
+            ),
+            OpenApiParameter(
+                name="page_size",
+                description="Number of users per page (max 100).",
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="fields",
+                description=(
+                    "Comma separated fields to return, the rest are "
+                    "neither computed nor queried (ex. ?fields=id,username)"
+                ),
+                required=False,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="omit",
+                description=(
+                    "Comma separated fields to leave out "
+                    "(ex. ?omit=picture)"
+                ),
+                required=False,
+                type=str,
+            ),
         ]
     )
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
 
-class UserDetailView(AuthenticationPermissionMixin, generics.RetrieveAPIView):
+class UserDetailView(
+    ConditionalGetMixin,
+    AuthenticationPermissionMixin,
+    generics.RetrieveAPIView,
+):
     """
     Endpoint for representation info about separate user
     """
@@ -128,6 +182,9 @@ class UserDetailView(AuthenticationPermissionMixin, generics.RetrieveAPIView):
     queryset = User.objects.all()
     lookup_field = "id"
 
+    def get_version_scopes(self):
+        return [user_scope(self.kwargs["id"])]
+
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
 
@@ -140,21 +197,72 @@ class UserDetailView(AuthenticationPermissionMixin, generics.RetrieveAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not request.user.following.filter(id=user_to_follow.id).exists():
-            request.user.following.add(user_to_follow)
+        with transaction.atomic():
+            followed = follows.follow_many(request.user, [user_to_follow])
+            if not followed:
+                follows.unfollow_many(request.user, [user_to_follow.id])
+
+        if followed:
             return Response(
                 {"detail": "You are now following this user."},
                 status=status.HTTP_200_OK,
             )
 
         else:
-            request.user.following.remove(user_to_follow)
             return Response(
                 {"detail": "You have unfollowed this user."},
                 status=status.HTTP_200_OK,
             )
 
 
+class BulkFollowView(AuthenticationPermissionMixin, generics.GenericAPIView):
+    """
+    Follows and unfollows many users at once, the result is reported
+    per user. Following a followed user or unfollowing a user you don't
+    follow changes nothing.
+    """
+
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_follow = serializer.validated_data["follow"]
+        to_unfollow = serializer.validated_data["unfollow"]
+
+        users = User.objects.only("id", "followers_count").in_bulk(
+            [*to_follow, *to_unfollow]
+        )
+        users.pop(request.user.id, None)
+        with transaction.atomic():
+            followed = follows.follow_many(
+                request.user, [users[pk] for pk in to_follow if pk in users]
+            )
+            unfollowed = follows.unfollow_many(
+                request.user, [pk for pk in to_unfollow if pk in users]
+            )
+
+        results = []
+        for ids, now_following, changed, self_error in (
+            (to_follow, True, followed, "You cannot follow yourself."),
+            (to_unfollow, False, unfollowed, "You cannot unfollow yourself."),
+        ):
+            for pk in ids:
+                if pk == request.user.id:
+                    results.append({"user": pk, "error": self_error})
+                elif pk not in users:
+                    results.append({"user": pk, "error": "Not found."})
+                else:
+                    results.append(
+                        {
+                            "user": pk,
+                            "following": now_following,
+                            "changed": pk in changed,
+                        }
+                    )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 class UserFollowView(AuthenticationPermissionMixin, generics.ListAPIView):
     """
     Endpoint for representation of followers and following users
@@ -175,15 +283,20 @@ class UserFollowView(AuthenticationPermissionMixin, generics.ListAPIView):
 
 class UserPostListView(AuthenticationPermissionMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = PostCursorPagination
 
     def get_queryset(self):
         user_id = self.kwargs["id"]
-        return Post.objects.filter(owner_id=user_id)
+        return PostSerializer.prepare_queryset(
+            Post.objects.filter(owner_id=user_id), self.request
+        )
 
 
 class UserLikedPostsListView(AuthenticationPermissionMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = PostCursorPagination
 
     def get_queryset(self):
-        user = User.objects.get(id=self.kwargs["id"])
-        return user.liked_posts.all()
+        return PostSerializer.prepare_queryset(
+            Post.objects.filter(like__user_id=self.kwargs["id"]), self.request
+        )